@@ -0,0 +1,43 @@
+"""
+Micro-benchmark for registering and stopping mocks in ``MockCache``.
+
+Usage::
+
+    python benchmarks/bench_mock_cache.py
+"""
+
+import functools
+import timeit
+
+from pytest_mock.plugin import MockCache
+
+
+class _Patch:
+    def stop(self) -> None:
+        pass
+
+
+def register_and_stop(count: int) -> None:
+    cache = MockCache()
+    # The cache only cares about identity, so avoid measuring MagicMock creation.
+    mocks = [object() for _ in range(count)]
+    for m in mocks:
+        cache.add(m, patch=_Patch())  # type:ignore[arg-type]
+    # Stop the newest mocks first, as ``mocker.stop`` is usually called on
+    # the most recent patches.
+    for m in reversed(mocks):
+        cache.remove(m)  # type:ignore[arg-type]
+
+
+def main() -> None:
+    for count in (10_000, 50_000, 100_000):
+        elapsed = min(
+            timeit.repeat(
+                functools.partial(register_and_stop, count), number=1, repeat=3
+            )
+        )
+        print(f"{count:>7} mocks: {elapsed * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Micro-benchmark comparing the per-call overhead of ``mocker.spy`` with
+``mocker.spy(..., fast=True)``.
+
+Usage::
+
+    python benchmarks/bench_spy.py
+"""
+
+import timeit
+from typing import Any
+
+from pytest_mock import MockerFixture
+
+
+class _Config:
+    def getini(self, name: str) -> Any:
+        return False
+
+
+class Foo:
+    def bar(self, x: int) -> int:
+        return x
+
+
+def measure(calls: int, **spy_kwargs: Any) -> float:
+    mocker = MockerFixture(_Config())
+    foo = Foo()
+    mocker.spy(foo, "bar", **spy_kwargs)
+    bar = foo.bar
+    try:
+        return min(
+            timeit.repeat(lambda: [bar(i) for i in range(calls)], number=1, repeat=5)
+        )
+    finally:
+        mocker.stopall()
+
+
+def main() -> None:
+    calls = 100_000
+    baseline = measure(calls)
+    fast = measure(calls, fast=True)
+    print(f"spy:            {baseline / calls * 1e6:6.2f} us/call")
+    print(f"spy(fast=True): {fast / calls * 1e6:6.2f} us/call")
+    print(f"speedup:        {baseline / fast:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
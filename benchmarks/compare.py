@@ -0,0 +1,70 @@
+"""
+Compare the results of ``benchmarks/suite.py`` against a baseline, flagging
+the benchmarks which became slower than the allowed threshold.
+
+Usage::
+
+    python benchmarks/suite.py --json results.json
+    python benchmarks/compare.py benchmarks/baseline.json results.json
+
+The times relative to the calibration workload are compared, rather than the
+absolute times, so baselines recorded on a different machine remain useful.
+
+Exits with status 1 if any benchmark regressed.
+"""
+
+import argparse
+import json
+import sys
+from typing import Any
+
+
+def load(path: str) -> dict[str, float]:
+    """Return the relative result of each benchmark in the given file."""
+    with open(path, encoding="utf-8") as f:
+        data: dict[str, Any] = json.load(f)
+    return {name: result["relative"] for name, result in data["results"].items()}
+
+
+def compare(
+    baseline: dict[str, float], current: dict[str, float], threshold: float
+) -> list[str]:
+    """Print a comparison table and return the names of the regressed benchmarks."""
+    regressions = []
+    print(f"{'benchmark':32} {'change':>8}")
+    for name, value in current.items():
+        if name not in baseline:
+            print(f"{name:32} {'new':>8}")
+            continue
+        change = value / baseline[name] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:32} {change:+8.1%}{flag}")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("baseline", help="JSON file with the baseline results")
+    parser.add_argument("current", help="JSON file with the results to check")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.3,
+        help="Maximum allowed slowdown, as a fraction (default: %(default)s)",
+    )
+    options = parser.parse_args(argv)
+
+    regressions = compare(
+        load(options.baseline), load(options.current), options.threshold
+    )
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Benchmark for the time taken to import pytest-mock, measured with
+``python -X importtime`` in fresh interpreters.
+
+The result is the best cumulative import time of ``pytest_mock`` (which
+includes ``pytest_mock.plugin`` and everything it imports that pytest does
+not), along with that time relative to the import time of ``pytest`` itself.
+
+Usage::
+
+    python benchmarks/importtime.py [--rounds N] [--json PATH]
+
+The results written with ``--json`` have the same format as the ones of
+``benchmarks/suite.py``, so they can be checked with ``benchmarks/compare.py``.
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+from typing import NamedTuple
+
+
+class Result(NamedTuple):
+    #: Best import time, in seconds.
+    time: float
+    #: ``time`` divided by the import time of pytest measured alongside it.
+    relative: float
+
+
+def _import_times() -> dict[str, float]:
+    """
+    Import pytest and pytest_mock in a new interpreter, returning the
+    cumulative import time in seconds of each top-level module.
+    """
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import pytest, pytest_mock"],
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stderr
+    times = {}
+    for line in output.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or line.endswith("imported package"):
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if not name.startswith("  "):
+            times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def run(rounds: int) -> Result:
+    best = best_pytest = float("inf")
+    for _ in range(rounds):
+        times = _import_times()
+        best = min(best, times["pytest_mock"])
+        best_pytest = min(best_pytest, times["pytest"])
+    return Result(best, best / best_pytest)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--rounds", type=int, default=10, help="default: %(default)s")
+    parser.add_argument("--json", metavar="PATH", help="Write the results to PATH")
+    options = parser.parse_args(argv)
+
+    name = "import pytest_mock"
+    result = run(options.rounds)
+    print(f"{'benchmark':32} {'time':>13} {'relative':>10}")
+    print(f"{name:32} {result.time * 1e3:10.3f} ms {result.relative:10.3f}")
+
+    if options.json:
+        with open(options.json, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "implementation": platform.python_implementation(),
+                    "results": {name: result._asdict()},
+                },
+                f,
+                indent=2,
+            )
+            f.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
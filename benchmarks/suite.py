@@ -0,0 +1,389 @@
+"""
+Benchmark suite for the hot paths of pytest-mock.
+
+Each benchmark measures a number of operations using a fresh ``MockerFixture``,
+and reports the best time per operation over a few rounds, along with that time
+relative to a calibration workload of plain Python code.
+
+Usage::
+
+    python benchmarks/suite.py [-k SUBSTRING] [--rounds N] [--json PATH]
+
+The results written with ``--json`` can be compared against the baseline
+stored in the repository with ``benchmarks/compare.py``.
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import sys
+import time
+from collections.abc import Callable
+from collections.abc import Iterator
+from typing import Any
+from typing import NamedTuple
+
+from pytest_mock import MockerFixture
+from pytest_mock.plugin import wrap_assert_methods
+
+# Signature of a benchmark: receives the fixture and the number of operations
+# to perform, and returns the time they took in seconds.
+Benchmark = Callable[[MockerFixture, int], float]
+
+BENCHMARKS: dict[str, tuple[Benchmark, int]] = {}
+
+# Operations of each calibration round, see ``_calibration``.
+CALIBRATION_NUMBER = 100
+
+
+def benchmark(name: str, number: int) -> Callable[[Benchmark], Benchmark]:
+    def register(func: Benchmark) -> Benchmark:
+        BENCHMARKS[name] = (func, number)
+        return func
+
+    return register
+
+
+class _Config:
+    def __init__(self) -> None:
+        self.cleanups: list[Callable[[], None]] = []
+
+    def getini(self, name: str) -> Any:
+        return False
+
+    def add_cleanup(self, func: Callable[[], None]) -> None:
+        self.cleanups.append(func)
+
+
+def _timed(op: Callable[[], object], number: int) -> float:
+    # Like timeit, do not let garbage collection interfere with the timings.
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(number):
+            op()
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+class Target:
+    def method(self, a: int, b: int = 0) -> int:
+        return a + b
+
+    async def async_method(self, a: int) -> int:
+        return a
+
+    def iterate(self, count: int) -> Iterator[int]:
+        return iter(range(count))
+
+
+class _Node:
+    def __init__(self, name: str, parent: "_Node | None" = None) -> None:
+        self.name = name
+        self.parent = parent
+        self.children: dict[str, _Node] = {}
+
+    def child(self, name: str) -> "_Node":
+        try:
+            return self.children[name]
+        except KeyError:
+            child = self.children[name] = _Node(name, self)
+            return child
+
+
+def _calibration(number: int) -> float:
+    """
+    Plain Python code doing the kind of work mocks do (creating objects and
+    looking up attributes and dicts), used to normalize results across machines.
+    """
+
+    def op() -> None:
+        root = _Node("root")
+        for i in range(50):
+            root.child(f"c{i % 10}").child("x").name.upper()
+
+    return _timed(op, number)
+
+
+# Patches are undone right away, so the same target is not patched repeatedly.
+
+
+@benchmark("patch + stop", 500)
+def bench_patch(mocker: MockerFixture, number: int) -> float:
+    return _timed(lambda: mocker.stop(mocker.patch("os.path.exists")), number)
+
+
+@benchmark("patch.object + stop", 500)
+def bench_patch_object(mocker: MockerFixture, number: int) -> float:
+    return _timed(lambda: mocker.stop(mocker.patch.object(os.path, "exists")), number)
+
+
+def _exists(path: str) -> bool:
+    return True
+
+
+@benchmark("patch.object new + stop", 5_000)
+def bench_patch_object_new(mocker: MockerFixture, number: int) -> float:
+    return _timed(
+        lambda: mocker.stop(mocker.patch.object(os.path, "exists", _exists)), number
+    )
+
+
+@benchmark("patch.object new + stop (over module_mocker)", 5_000)
+def bench_patch_object_new_layered(mocker: MockerFixture, number: int) -> float:
+    module_mocker = MockerFixture(_Config())
+    module_mocker.patch._scope = "module"
+    module_mocker.patch.object(os.path, "exists")
+    try:
+        return _timed(
+            lambda: mocker.stop(mocker.patch.object(os.path, "exists", _exists)),
+            number,
+        )
+    finally:
+        module_mocker.stopall()
+
+
+@benchmark("patch.dict + stop", 5_000)
+def bench_patch_dict(mocker: MockerFixture, number: int) -> float:
+    values = {str(i): i for i in range(20)}
+    return _timed(
+        lambda: mocker.stop(mocker.patch.dict(values, {"0": -1, "new": 1})), number
+    )
+
+
+# A registry of 100k entries, patching a few of them.
+_LARGE_DICT = {f"key{i}": i for i in range(100_000)}
+
+
+@benchmark("patch.dict + stop (100k keys)", 20)
+def bench_patch_dict_large(mocker: MockerFixture, number: int) -> float:
+    return _timed(
+        lambda: mocker.stop(mocker.patch.dict(_LARGE_DICT, {"key0": -1, "new": 1})),
+        number,
+    )
+
+
+@benchmark("patch.dict incremental (100k keys)", 5_000)
+def bench_patch_dict_incremental(mocker: MockerFixture, number: int) -> float:
+    return _timed(
+        lambda: mocker.stop(
+            mocker.patch.dict(_LARGE_DICT, {"key0": -1, "new": 1}, incremental=True)
+        ),
+        number,
+    )
+
+
+@benchmark("patch.env + stop", 5_000)
+def bench_patch_env(mocker: MockerFixture, number: int) -> float:
+    return _timed(
+        lambda: mocker.stop(mocker.patch.env(PYTEST_MOCK_A="1", PYTEST_MOCK_B=None)),
+        number,
+    )
+
+
+@benchmark("patch.multiple + stop", 200)
+def bench_patch_multiple(mocker: MockerFixture, number: int) -> float:
+    return _timed(
+        lambda: mocker.stop(
+            mocker.patch.multiple(
+                "os.path", exists=mocker.DEFAULT, isdir=mocker.DEFAULT
+            )
+        ),
+        number,
+    )
+
+
+@benchmark("create_autospec", 100)
+def bench_create_autospec(mocker: MockerFixture, number: int) -> float:
+    return _timed(lambda: mocker.create_autospec(Target, instance=True), number)
+
+
+@benchmark("spy: create", 200)
+def bench_spy_create(mocker: MockerFixture, number: int) -> float:
+    return _timed(lambda: mocker.spy(Target(), "method"), number)
+
+
+@benchmark("spy: call", 10_000)
+def bench_spy_call(mocker: MockerFixture, number: int) -> float:
+    target = Target()
+    mocker.spy(target, "method")
+    return _timed(lambda: target.method(1, b=2), number)
+
+
+@benchmark("spy: async call", 5_000)
+def bench_spy_async_call(mocker: MockerFixture, number: int) -> float:
+    target = Target()
+    mocker.spy(target, "async_method")
+
+    async def run() -> float:
+        start = time.perf_counter()
+        for i in range(number):
+            await target.async_method(i)
+        return time.perf_counter() - start
+
+    return asyncio.run(run())
+
+
+@benchmark("spy: duplicate_iterators", 5_000)
+def bench_spy_duplicate_iterators(mocker: MockerFixture, number: int) -> float:
+    target = Target()
+    mocker.spy(target, "iterate", duplicate_iterators=True)
+    return _timed(lambda: list(target.iterate(10)), number)
+
+
+def _parse(text: str) -> list[str]:
+    return text.split()
+
+
+@benchmark("memoize: hit", 20_000)
+def bench_memoize_hit(mocker: MockerFixture, number: int) -> float:
+    mocker.memoize(f"{__name__}._parse")
+    return _timed(lambda: _parse("a b c"), number)
+
+
+def _called_mocks(mocker: MockerFixture, count: int) -> list[Any]:
+    mocks = []
+    for _ in range(count):
+        m = mocker.patch.object(os.path, "exists")
+        m("path")
+        m.child.method(1)
+        mocks.append(m)
+    return mocks
+
+
+@benchmark("resetall (50 mocks)", 50)
+def bench_resetall(mocker: MockerFixture, number: int) -> float:
+    _called_mocks(mocker, 50)
+    return _timed(mocker.resetall, number)
+
+
+@benchmark("stopall (per mock)", 1_000)
+def bench_stopall(mocker: MockerFixture, number: int) -> float:
+    for _ in range(number):
+        mocker.patch.object(os.path, "exists")
+    return _timed(mocker.stopall, 1)
+
+
+@benchmark("assert_called_with", 20_000)
+def bench_assert_called_with(mocker: MockerFixture, number: int) -> float:
+    m = mocker.MagicMock()
+    m(1, b=2)
+    return _timed(lambda: m.assert_called_with(1, b=2), number)
+
+
+@benchmark("assert_called_once_with", 20_000)
+def bench_assert_called_once_with(mocker: MockerFixture, number: int) -> float:
+    m = mocker.MagicMock()
+    m(1, b=2)
+    return _timed(lambda: m.assert_called_once_with(1, b=2), number)
+
+
+@benchmark("assert_not_called", 50_000)
+def bench_assert_not_called(mocker: MockerFixture, number: int) -> float:
+    m = mocker.MagicMock()
+    return _timed(m.assert_not_called, number)
+
+
+@benchmark("assert_awaited_with", 20_000)
+def bench_assert_awaited_with(mocker: MockerFixture, number: int) -> float:
+    m = mocker.AsyncMock()
+    asyncio.run(m(1, b=2))
+    return _timed(lambda: m.assert_awaited_with(1, b=2), number)
+
+
+@benchmark("assert_called_with (failure)", 1_000)
+def bench_assert_called_with_failure(mocker: MockerFixture, number: int) -> float:
+    m = mocker.MagicMock()
+    m(1, b=2)
+
+    def op() -> None:
+        try:
+            m.assert_called_with(2, b=3)
+        except AssertionError:
+            pass
+
+    return _timed(op, number)
+
+
+@benchmark("assert_has_calls", 2_000)
+def bench_assert_has_calls(mocker: MockerFixture, number: int) -> float:
+    m = mocker.MagicMock()
+    for i in range(50):
+        m(i)
+    calls = [mocker.call(i) for i in range(45, 50)]
+    return _timed(lambda: m.assert_has_calls(calls), number)
+
+
+class Result(NamedTuple):
+    #: Best time per operation, in seconds.
+    time: float
+    #: ``time`` divided by the calibration time measured alongside it.
+    relative: float
+
+
+def run(name: str, rounds: int) -> Result:
+    """
+    Run the given benchmark, interleaving its rounds with calibration rounds so
+    the relative result is not affected by the machine getting slower or
+    faster during the run.
+    """
+    func, number = BENCHMARKS[name]
+    best = best_calibration = float("inf")
+    for _ in range(rounds):
+        best_calibration = min(best_calibration, _calibration(CALIBRATION_NUMBER))
+        mocker = MockerFixture(_Config())
+        try:
+            best = min(best, func(mocker, number) / number)
+        finally:
+            mocker.stopall()
+    return Result(best, best / (best_calibration / CALIBRATION_NUMBER))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "-k", dest="keyword", default="", help="Only run benchmarks containing this"
+    )
+    parser.add_argument("--rounds", type=int, default=5, help="default: %(default)s")
+    parser.add_argument("--json", metavar="PATH", help="Write the results to PATH")
+    options = parser.parse_args(argv)
+
+    # The assert_* methods are wrapped when running under pytest.
+    config = _Config()
+    wrap_assert_methods(config)
+    try:
+        results = {}
+        print(f"{'benchmark':32} {'time':>13} {'relative':>10}")
+        for name in BENCHMARKS:
+            if options.keyword not in name:
+                continue
+            results[name] = result = run(name, options.rounds)
+            print(f"{name:32} {result.time * 1e6:10.3f} us {result.relative:10.3f}")
+    finally:
+        for cleanup in reversed(config.cleanups):
+            cleanup()
+
+    if options.json:
+        with open(options.json, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "implementation": platform.python_implementation(),
+                    "results": {
+                        name: result._asdict() for name, result in results.items()
+                    },
+                },
+                f,
+                indent=2,
+            )
+            f.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,21 +1,45 @@
-from pytest_mock.plugin import AsyncMockType
+from typing import TYPE_CHECKING
+from typing import Any
+
+from pytest_mock.plugin import CallLog
+from pytest_mock.plugin import LoggedCall
 from pytest_mock.plugin import MockerFixture
-from pytest_mock.plugin import MockType
+from pytest_mock.plugin import MockSnapshot
 from pytest_mock.plugin import PytestMockWarning
-from pytest_mock.plugin import SpyType
 from pytest_mock.plugin import class_mocker
 from pytest_mock.plugin import mocker
 from pytest_mock.plugin import module_mocker
 from pytest_mock.plugin import package_mocker
 from pytest_mock.plugin import pytest_addoption
 from pytest_mock.plugin import pytest_configure
+from pytest_mock.plugin import pytest_runtest_call
+from pytest_mock.plugin import pytest_runtest_setup
+from pytest_mock.plugin import read_call_log
 from pytest_mock.plugin import session_mocker
 
+if TYPE_CHECKING:
+    from pytest_mock.plugin import AsyncMockType
+    from pytest_mock.plugin import MockType
+    from pytest_mock.plugin import SpyType
+
 MockFixture = MockerFixture  # backward-compatibility only (#204)
 
+
+def __getattr__(name: str) -> Any:
+    # The mock types import the mock module, so only do it when they are used.
+    from pytest_mock import plugin
+
+    if name in plugin._MOCK_TYPES:
+        return getattr(plugin, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 __all__ = [
     "AsyncMockType",
+    "CallLog",
+    "LoggedCall",
     "MockFixture",
+    "MockSnapshot",
     "MockType",
     "MockerFixture",
     "PytestMockWarning",
@@ -26,5 +50,8 @@ __all__ = [
     "package_mocker",
     "pytest_addoption",
     "pytest_configure",
+    "pytest_runtest_call",
+    "pytest_runtest_setup",
+    "read_call_log",
     "session_mocker",
 ]
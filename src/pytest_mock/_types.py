@@ -0,0 +1,38 @@
+"""
+Types exported by pytest-mock which need the ``unittest.mock`` module, kept
+apart so it is only imported when they are used (see ``plugin.__getattr__``).
+"""
+
+import unittest.mock
+from collections import Counter
+from collections.abc import Iterator
+from collections.abc import MutableSequence
+from typing import TYPE_CHECKING
+from typing import Any
+
+if TYPE_CHECKING:
+    from .plugin import CallLog
+    from .plugin import _SpyLocal
+
+AsyncMockType = unittest.mock.AsyncMock
+MockType = (
+    unittest.mock.MagicMock
+    | unittest.mock.AsyncMock
+    | unittest.mock.NonCallableMagicMock
+)
+
+
+class SpyType(unittest.mock.Mock):
+    """
+    Type stub used to annotate the result of ``mocker.spy``.
+    """
+
+    spy_return: Any
+    spy_return_iter: Iterator[Any] | None
+    spy_return_list: MutableSequence[Any]
+    spy_exception: BaseException | None
+    spy_call_log: "CallLog | None"
+    spy_local: "_SpyLocal | None"
+    spy_max_concurrency: int | None
+    spy_latencies: MutableSequence[float] | None
+    spy_task_calls: Counter[str | None] | None
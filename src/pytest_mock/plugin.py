@@ -1,17 +1,37 @@
+from __future__ import annotations
+
 import builtins
+import contextlib
+import copy
 import functools
+import heapq
+import importlib
 import inspect
 import itertools
-import unittest.mock
+import json
+import os
+import re
+import sys
+import threading
+import time
+import types
 import warnings
+import weakref
+from collections import Counter
+from collections import deque
+from collections.abc import AsyncIterator
 from collections.abc import Callable
 from collections.abc import Generator
 from collections.abc import Iterable
 from collections.abc import Iterator
 from collections.abc import Mapping
+from collections.abc import MutableSequence
 from dataclasses import dataclass
 from dataclasses import field
+from typing import TYPE_CHECKING
 from typing import Any
+from typing import Generic
+from typing import NamedTuple
 from typing import TypeVar
 from typing import cast
 from typing import overload
@@ -23,23 +43,536 @@ from ._util import parse_ini_boolean
 
 _T = TypeVar("_T")
 
-AsyncMockType = unittest.mock.AsyncMock
-MockType = (
-    unittest.mock.MagicMock
-    | unittest.mock.AsyncMock
-    | unittest.mock.NonCallableMagicMock
-)
+if TYPE_CHECKING:
+    import unittest.mock
+
+    from ._types import AsyncMockType
+    from ._types import MockType
+    from ._types import SpyType
+
+# Names which need the mock module, which is only imported once they are used
+# so the plugin does not slow down sessions which do not use mocks.
+_MOCK_TYPES = ("AsyncMockType", "MockType", "SpyType")
+
+
+def __getattr__(name: str) -> Any:
+    if name in _MOCK_TYPES:
+        from . import _types
+
+        value = getattr(_types, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class _StrongRef(Generic[_T]):
+    """
+    Mimics a ``weakref.ref`` for objects which do not support weak references.
+    """
+
+    __slots__ = ("_obj",)
+
+    def __init__(self, obj: _T) -> None:
+        self._obj = obj
+
+    def __call__(self) -> _T:
+        return self._obj
+
+    def __repr__(self) -> str:
+        return f"<_StrongRef to {self._obj!r}>"
+
+
+def _weak_or_strong_ref(obj: Any) -> Callable[[], Any]:
+    try:
+        return weakref.ref(obj)
+    except TypeError:
+        return _StrongRef(obj)
+
+
+def _no_ref(obj: Any) -> Any:
+    return obj
+
+
+_SPY_RECORD_MODES = ("all", "last", "none")
+
+
+def _new_spy_return_list(
+    record: str, max_records: int | None, concurrent: bool = False
+) -> MutableSequence[Any]:
+    if concurrent:
+        return _ConcurrentReturnList(1 if record == "last" else max_records)
+    if record == "last":
+        return _BoundedReturnList(maxlen=1)
+    if max_records is not None:
+        return _BoundedReturnList(maxlen=max_records)
+    return []
+
+
+class _BoundedReturnList(deque[Any]):
+    """
+    ``spy_return_list`` of ``mocker.spy(..., record="last")`` or with
+    ``max_records``: a deque which compares equal to lists too.
+    """
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, list):
+            return list(self) == other
+        return super().__eq__(other)
+
+    def __ne__(self, other: object) -> bool:
+        return not self == other
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+class _SpyLocal(threading.local):
+    """
+    ``spy_local`` of ``mocker.spy(..., concurrent=True)``: the ``spy_*``
+    attributes of the last call made by the current thread.
+    """
+
+    spy_return: Any = None
+    spy_return_iter: Iterator[Any] | None = None
+    spy_exception: BaseException | None = None
+
+
+class _ConcurrentReturnList(MutableSequence[Any]):
+    """
+    ``spy_return_list`` of ``mocker.spy(..., concurrent=True)``.
+
+    Each thread appends to its own buffer, so recording does not need a lock;
+    the buffers are merged in the order the values were appended when read.
+    """
+
+    def __init__(self, maxlen: int | None) -> None:
+        self.maxlen = maxlen
+        self._local = threading.local()
+        self._seq = itertools.count()
+        # Guards the registration of the buffers, not the appends to them.
+        self._lock = threading.Lock()
+        self._buffers: list[deque[tuple[int, Any]]] = []
+
+    def append(self, value: Any) -> None:
+        try:
+            buffer = self._local.buffer
+        except AttributeError:
+            buffer = self._local.buffer = deque(maxlen=self.maxlen)
+            with self._lock:
+                self._buffers.append(buffer)
+        buffer.append((next(self._seq), value))
+
+    def _records(self) -> list[tuple[int, Any]]:
+        with self._lock:
+            buffers = [list(buffer) for buffer in self._buffers]
+        records = list(heapq.merge(*buffers, key=lambda record: record[0]))
+        if self.maxlen is not None:
+            del records[: -self.maxlen]
+        return records
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [value for _, value in self._records()[index]]
+        return self._records()[index][1]
+
+    def __delitem__(self, index: Any) -> None:
+        records = self._records()
+        if isinstance(index, slice):
+            removed = {seq for seq, _ in records[index]}
+        else:
+            removed = {records[index][0]}
+        with self._lock:
+            for buffer in self._buffers:
+                kept = [record for record in buffer if record[0] not in removed]
+                buffer.clear()
+                buffer.extend(kept)
+
+    def __setitem__(self, index: Any, value: Any) -> None:
+        raise TypeError("spy_return_list of concurrent spies can only be appended to")
+
+    def insert(self, index: int, value: Any) -> None:
+        raise TypeError("spy_return_list of concurrent spies can only be appended to")
+
+    def __len__(self) -> int:
+        return len(self._records())
+
+    def clear(self) -> None:
+        with self._lock:
+            for buffer in self._buffers:
+                buffer.clear()
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (list, _ConcurrentReturnList)):
+            return list(self) == list(other)
+        return NotImplemented
 
+    def __repr__(self) -> str:
+        return repr(list(self))
 
-class SpyType(unittest.mock.Mock):
+
+def _publish_spy_local(spy_obj: Any, spy_local: _SpyLocal, lock: Any) -> None:
+    """Copy the last call of the current thread to the ``spy_*`` attributes."""
+    with lock:
+        spy_obj.spy_return = spy_local.spy_return
+        spy_obj.spy_return_iter = spy_local.spy_return_iter
+        spy_obj.spy_exception = spy_local.spy_exception
+
+
+_ITERATOR_STRATEGIES = ("full", "ring", "sample", "summary")
+
+
+class _SpyBuffer:
+    """
+    Items of a duplicated iterator kept for the copy given to the spy: every
+    ``every`` item of the source, up to ``maxlen`` unread items (the oldest ones
+    are dropped and counted in ``dropped``).
+    """
+
+    def __init__(self, maxlen: int | None, every: int) -> None:
+        self.items: deque[Any] = deque(maxlen=maxlen)
+        self.every = every
+        self.seen = 0
+        self.dropped = 0
+
+    def sampled(self) -> bool:
+        """Count an item of the source, returning whether the spy copy gets it."""
+        self.seen += 1
+        return (self.seen - 1) % self.every == 0
+
+    def add(self, item: Any) -> None:
+        if self.sampled():
+            if len(self.items) == self.items.maxlen:
+                self.dropped += 1
+            self.items.append(item)
+
+
+class _Tee:
+    """
+    Duplicates an iterator like ``itertools.tee``, but buffering only the items
+    selected by a :class:`_SpyBuffer` for the spy copy. The copy of the caller
+    (index 0) always gets every item.
     """
-    Type stub used to annotate the result of ``mocker.spy``.
+
+    def __init__(self, source: Iterator[Any], spy_buffer: _SpyBuffer) -> None:
+        self._source = source
+        self._buffer: deque[Any] = deque()
+        self.spy_buffer = spy_buffer
+
+    def next(self, index: int) -> Any:
+        if index == 0:
+            if self._buffer:
+                return self._buffer.popleft()
+            item = next(self._source)
+            self.spy_buffer.add(item)
+            return item
+        if self.spy_buffer.items:
+            return self.spy_buffer.items.popleft()
+        while True:
+            item = next(self._source)
+            self._buffer.append(item)
+            if self.spy_buffer.sampled():
+                return item
+
+
+class _AsyncTee:
+    """
+    Like :class:`_Tee`, for async iterators.
     """
 
-    spy_return: Any
-    spy_return_iter: Iterator[Any] | None
-    spy_return_list: list[Any]
-    spy_exception: BaseException | None
+    def __init__(self, source: AsyncIterator[Any], spy_buffer: _SpyBuffer) -> None:
+        self._source = source
+        self._buffer: deque[Any] = deque()
+        self.spy_buffer = spy_buffer
+        import asyncio
+
+        # Only one of the copies may wait for the source at a time.
+        self._lock = asyncio.Lock()
+        self._exhausted = False
+
+    async def next(self, index: int) -> Any:
+        buffer = self._buffer if index == 0 else self.spy_buffer.items
+        if not buffer:
+            async with self._lock:
+                # The other copy might have fetched an item in the meantime.
+                if not buffer:
+                    return await self._fetch(index)
+        return buffer.popleft()
+
+    async def _fetch(self, index: int) -> Any:
+        while True:
+            if self._exhausted:
+                raise StopAsyncIteration
+            try:
+                item = await self._source.__anext__()
+            except StopAsyncIteration:
+                self._exhausted = True
+                raise
+            if index == 0:
+                self.spy_buffer.add(item)
+                return item
+            self._buffer.append(item)
+            if self.spy_buffer.sampled():
+                return item
+
+    async def aclose(self) -> None:
+        self._exhausted = True
+        await _aclose(self._source)
+
+
+class _TeeIterator(Iterator[Any]):
+    def __init__(self, tee: _Tee, index: int) -> None:
+        self._tee = tee
+        self._index = index
+
+    @property
+    def dropped(self) -> int:
+        """Number of items dropped from the spy copy because its buffer was full."""
+        return self._tee.spy_buffer.dropped
+
+    def __next__(self) -> Any:
+        return self._tee.next(self._index)
+
+
+class _AsyncTeeIterator(AsyncIterator[Any]):
+    def __init__(self, tee: _AsyncTee, index: int) -> None:
+        self._tee = tee
+        self._index = index
+
+    @property
+    def dropped(self) -> int:
+        """Number of items dropped from the spy copy because its buffer was full."""
+        return self._tee.spy_buffer.dropped
+
+    def __anext__(self) -> Any:
+        return self._tee.next(self._index)
+
+    async def aclose(self) -> None:
+        """
+        Close the source, like closing the async generator this copy stands in
+        for; closing the spy copy does nothing.
+        """
+        if self._index == 0:
+            await self._tee.aclose()
+
+
+async def _aclose(iterator: AsyncIterator[Any]) -> None:
+    aclose = getattr(iterator, "aclose", None)
+    if aclose is not None:
+        await aclose()
+
+
+class _IteratorSummary:
+    """
+    ``spy_return_iter`` of ``mocker.spy(..., duplicate_iterators="summary")``:
+    the number of items read by the caller, and a digest of their ``repr``.
+    """
+
+    def __init__(self) -> None:
+        import hashlib
+
+        self.count = 0
+        self._hash = hashlib.blake2b(digest_size=16)
+
+    def add(self, item: Any) -> None:
+        self.count += 1
+        self._hash.update(repr(item).encode("utf-8", "backslashreplace") + b"\0")
+
+    @property
+    def digest(self) -> str:
+        return self._hash.hexdigest()
+
+    def __repr__(self) -> str:
+        return f"<iterator summary count={self.count} digest={self.digest}>"
+
+
+def _summarized(source: Iterator[Any], summary: _IteratorSummary) -> Iterator[Any]:
+    for item in source:
+        summary.add(item)
+        yield item
+
+
+async def _async_summarized(
+    source: AsyncIterator[Any], summary: _IteratorSummary
+) -> AsyncIterator[Any]:
+    try:
+        async for item in source:
+            summary.add(item)
+            yield item
+    finally:
+        await _aclose(source)
+
+
+def _duplicate_iterator(
+    value: Any, strategy: str, max_buffered: int | None, sample_every: int | None
+) -> tuple[Any, Any]:
+    """
+    Return the value to give to the caller of a spied function, and the copy
+    of it for ``spy_return_iter`` if it is an iterator or an async iterator.
+    """
+    if strategy == "summary":
+        summary = _IteratorSummary()
+        if isinstance(value, Iterator):
+            return _summarized(value, summary), summary
+        if isinstance(value, AsyncIterator):
+            return _async_summarized(value, summary), summary
+        return value, None
+    if isinstance(value, Iterator):
+        if max_buffered is None and sample_every is None:
+            value, copy = itertools.tee(value, 2)
+            return value, copy
+        tee = _Tee(value, _SpyBuffer(max_buffered, sample_every or 1))
+        return _TeeIterator(tee, 0), _TeeIterator(tee, 1)
+    if isinstance(value, AsyncIterator):
+        async_tee = _AsyncTee(value, _SpyBuffer(max_buffered, sample_every or 1))
+        return _AsyncTeeIterator(async_tee, 0), _AsyncTeeIterator(async_tee, 1)
+    return value, None
+
+
+def _current_task_name() -> str | None:
+    import asyncio
+
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        # Not running in an asyncio event loop.
+        return None
+    return None if task is None else task.get_name()
+
+
+def _init_async_spy_metrics(spy_obj: Any, record: str, max_records: int | None) -> None:
+    spy_obj.spy_max_concurrency = 0
+    # The latencies are kept like the return values.
+    spy_obj.spy_latencies = (
+        None if record == "none" else _new_spy_return_list(record, max_records)
+    )
+    spy_obj.spy_task_calls = Counter()
+
+
+def _own_attribute(obj: Any, name: str) -> Any:
+    """
+    Return the attribute set on ``obj`` itself, or ``None``: unlike ``getattr``,
+    this does not create child mocks.
+    """
+    if isinstance(obj, _FastSpy):
+        return getattr(obj, name)
+    try:
+        return vars(obj).get(name)
+    except TypeError:
+        return None
+
+
+class _FastSpy:
+    """
+    Lightweight call recorder returned by ``mocker.spy(..., fast=True)``.
+
+    Calls are recorded directly by the installed wrapper function, bypassing
+    the mock call machinery. A full mock object with the recorded calls is only
+    built when some other mock attribute (like ``assert_called_with``) is
+    accessed.
+    """
+
+    __slots__ = (
+        "__weakref__",
+        "_mock_module",
+        "_name",
+        "_spec",
+        "_view",
+        "_view_calls",
+        "await_args_list",
+        "call_args_list",
+        "spy_call_log",
+        "spy_exception",
+        "spy_latencies",
+        "spy_local",
+        "spy_max_concurrency",
+        "spy_return",
+        "spy_return_iter",
+        "spy_return_list",
+        "spy_task_calls",
+    )
+
+    def __init__(
+        self,
+        mock_module: Any,
+        spec: Any,
+        name: str,
+        spy_return_list: MutableSequence[Any],
+    ) -> None:
+        self._mock_module = mock_module
+        self._spec = spec
+        self._name = name
+        self._view: MockType | None = None
+        self._view_calls = 0
+        self.call_args_list: list[Any] = []
+        self.await_args_list: list[Any] = []
+        self.spy_return: Any = None
+        self.spy_return_iter: Iterator[Any] | None = None
+        self.spy_return_list = spy_return_list
+        self.spy_exception: BaseException | None = None
+        self.spy_call_log: CallLog | None = None
+        self.spy_local: _SpyLocal | None = None
+        self.spy_max_concurrency: int | None = None
+        self.spy_latencies: MutableSequence[float] | None = None
+        self.spy_task_calls: Counter[str | None] | None = None
+
+    @property
+    def call_count(self) -> int:
+        return len(self.call_args_list)
+
+    @property
+    def called(self) -> bool:
+        return bool(self.call_args_list)
+
+    @property
+    def call_args(self) -> Any:
+        return self.call_args_list[-1] if self.call_args_list else None
+
+    @property
+    def await_count(self) -> int:
+        return len(self.await_args_list)
+
+    @property
+    def await_args(self) -> Any:
+        return self.await_args_list[-1] if self.await_args_list else None
+
+    def reset_mock(self, *args: Any, **kwargs: Any) -> None:
+        # New lists like ``Mock.reset_mock``, which snapshots rely on.
+        self.call_args_list = []
+        self.await_args_list = []
+        self._view = None
+
+    def _mock_view(self) -> MockType:
+        """
+        Return a mock object which contains the calls recorded so far, updating
+        it with the calls recorded since it was last requested.
+        """
+        view = self._view
+        if view is None or self._view_calls > len(self.call_args_list):
+            view = self._mock_module.MagicMock(spec=self._spec, name=self._name)
+            self._view = view
+            self._view_calls = 0
+        new_calls = self.call_args_list[self._view_calls :]
+        if new_calls:
+            call = self._mock_module.call
+            view.call_args_list.extend(new_calls)
+            view.mock_calls.extend(call(*c.args, **c.kwargs) for c in new_calls)
+            view.call_count = self.call_count
+            view.call_args = self.call_args
+            view.called = True
+            self._view_calls = len(self.call_args_list)
+        if hasattr(type(view), "await_args_list"):
+            view.await_args_list[:] = self.await_args_list
+            view.await_count = self.await_count
+            view.await_args = self.await_args
+        return view
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self._mock_view(), name)
+
+    def __repr__(self) -> str:
+        return f"<fast spy {self._name!r} id={id(self)}>"
 
 
 class PytestMockWarning(UserWarning):
@@ -56,34 +589,1460 @@ class MockCacheItem:
 class MockCache:
     """
     Cache MagicMock and Patcher instances so we can undo them later.
+
+    Items are kept in insertion order (so they can be undone in LIFO order),
+    and indexed by the identity of their mock, so finding and removing a
+    single mock does not depend on the number of registered mocks.
     """
 
-    cache: list[MockCacheItem] = field(default_factory=list)
+    cache: dict[int, MockCacheItem] = field(default_factory=dict)
+    _index: dict[int, list[MockCacheItem]] = field(default_factory=dict, repr=False)
 
-    def _find(self, mock: MockType) -> MockCacheItem:
-        for mock_item in self.cache:
-            if mock_item.mock is mock:
-                return mock_item
-        raise ValueError("This mock object is not registered")
+    def _find(self, mock: object) -> MockCacheItem:
+        # The same object might be registered more than once (for example when
+        # patching different targets with the same ``new`` object): the index
+        # keeps them in registration order, and we return the oldest one.
+        try:
+            return self._index[id(mock)][0]
+        except KeyError:
+            raise ValueError("This mock object is not registered") from None
 
     def add(self, mock: MockType, **kwargs: Any) -> MockCacheItem:
-        self.cache.append(MockCacheItem(mock=mock, **kwargs))
-        return self.cache[-1]
+        mock_item = MockCacheItem(mock=mock, **kwargs)
+        self.cache[id(mock_item)] = mock_item
+        self._index.setdefault(id(mock), []).append(mock_item)
+        return mock_item
 
-    def remove(self, mock: MockType) -> None:
+    def remove(self, mock: object) -> None:
         mock_item = self._find(mock)
         if mock_item.patch:
             mock_item.patch.stop()
-        self.cache.remove(mock_item)
+        self._discard(mock_item)
+
+    def _discard(self, mock_item: MockCacheItem) -> None:
+        del self.cache[id(mock_item)]
+        items = self._index[id(mock_item.mock)]
+        if len(items) == 1:
+            del self._index[id(mock_item.mock)]
+        else:
+            # Compare by identity: ``list.remove`` would compare the mocks themselves.
+            del items[next(i for i, item in enumerate(items) if item is mock_item)]
 
     def clear(self) -> None:
-        for mock_item in reversed(self.cache):
+        for mock_item in reversed(self.cache.values()):
             if mock_item.patch is not None:
                 mock_item.patch.stop()
         self.cache.clear()
+        self._index.clear()
 
     def __iter__(self) -> Iterator[MockCacheItem]:
-        return iter(self.cache)
+        return iter(self.cache.values())
+
+
+class _PatchGroup:
+    """
+    Several started patches, stopped as a single unit (in reverse order).
+    """
+
+    def __init__(self) -> None:
+        self._started: list[Any] = []
+
+    def add(self, p: Any) -> None:
+        self._started.append(p)
+
+    def stop(self) -> None:
+        while self._started:
+            self._started.pop().stop()
+
+
+# Marks keys which were not in the dict patched by ``_IncrementalDictPatch``.
+_ABSENT = object()
+
+
+class _IncrementalDictPatch:
+    """
+    Patcher of ``mocker.patch.dict(..., incremental=True)``. Unlike
+    ``mock.patch.dict``, which copies the whole dict on start and restores
+    all of it on stop, it only saves the previous values of the keys it sets,
+    and restores just those, so patching very large mappings (such as
+    ``sys.modules``) costs time proportional to the number of patched keys.
+
+    The keys in ``remove`` are removed from the dict while it is patched.
+    """
+
+    def __init__(
+        self,
+        in_dict: Any,
+        values: Mapping[Any, Any] | Iterable[tuple[Any, Any]] = (),
+        clear: bool = False,
+        remove: Iterable[Any] = (),
+        **kwargs: Any,
+    ) -> None:
+        self.in_dict = in_dict
+        self.values = dict(values, **kwargs)
+        self.remove = [key for key in remove if key not in self.values]
+        self.clear = clear
+        self._saved: dict[Any, Any] | None = None
+
+    def start(self) -> Any:
+        if isinstance(self.in_dict, str):
+            self.in_dict = _target_cache.resolve(self.in_dict)
+        in_dict = self.in_dict
+        if self.clear:
+            self._saved = dict(in_dict)
+            in_dict.clear()
+        else:
+            self._saved = {}
+            for key in itertools.chain(self.values, self.remove):
+                try:
+                    self._saved[key] = in_dict[key]
+                except KeyError:
+                    self._saved[key] = _ABSENT
+        try:
+            in_dict.update(self.values)
+            for key in self.remove:
+                if key in in_dict:
+                    del in_dict[key]
+        except BaseException:
+            self.stop()
+            raise
+        return in_dict
+
+    def stop(self) -> None:
+        saved, self._saved = self._saved, None
+        if saved is None:
+            return
+        in_dict = self.in_dict
+        if self.clear:
+            in_dict.clear()
+            in_dict.update(saved)
+            return
+        for key, value in saved.items():
+            if value is not _ABSENT:
+                in_dict[key] = value
+            elif key in in_dict:
+                del in_dict[key]
+
+
+# Scopes of the mockers whose patches are registered in ``_patch_layers``.
+_LAYERED_SCOPES = frozenset(("class", "module", "package", "session"))
+
+# Names of the mocker fixtures, by scope.
+_MOCKER_FIXTURES = {
+    "function": "mocker",
+    "class": "class_mocker",
+    "module": "module_mocker",
+    "package": "package_mocker",
+    "session": "session_mocker",
+}
+
+
+class _LayeredPatch:
+    """
+    Patch of an attribute started by ``mocker.patch`` or ``mocker.patch.object``
+    of a mocker broader than ``mocker``, or over the patch of such a mocker,
+    registered in ``_patch_layers`` while started.
+
+    When a mocker patches an attribute which another mocker (of a broader
+    scope) has patched already, the new patch is an overlay: it only sets the
+    attribute to the new object, and sets it back to the object of the patch
+    below when stopped, instead of going through the mock module again.
+    """
+
+    __slots__ = (
+        "attribute",
+        "below",
+        "installed",
+        "is_overlay",
+        "mock_cache",
+        "original",
+        "owner",
+        "patcher",
+        "scope",
+    )
+
+    def __init__(
+        self,
+        owner: Any,
+        attribute: str,
+        mock_cache: MockCache,
+        scope: str | None,
+        original: Any,
+        is_overlay: bool,
+    ) -> None:
+        self.owner = owner
+        self.attribute = attribute
+        self.mock_cache = mock_cache
+        self.scope = scope
+        #: What the attribute was before it was first patched.
+        self.original = original
+        self.is_overlay = is_overlay
+        #: The mock module patcher, if the patch was not a plain overlay.
+        self.patcher: Any = None
+        self.below: Any = None
+        self.installed: Any = None
+
+    def start(self, patcher: Any) -> None:
+        self.patcher = patcher
+        self.installed = patcher.start()
+
+    def overlay(self, new: Any) -> None:
+        """Install ``new`` over the patch below, which is in ``vars(owner)``."""
+        self.below = vars(self.owner)[self.attribute]
+        setattr(self.owner, self.attribute, new)
+        self.installed = new
+
+    def register(self) -> None:
+        _patch_layers.setdefault((id(self.owner), self.attribute), []).append(self)
+
+    def stop(self) -> None:
+        key = (id(self.owner), self.attribute)
+        layers = _patch_layers.get(key, [])
+        if self in layers:
+            layers.remove(self)
+            if not layers:
+                del _patch_layers[key]
+        if not self.is_overlay:
+            self.patcher.stop()
+            return
+        # The patch below might have been stopped already, undoing this one.
+        try:
+            current = vars(self.owner).get(self.attribute, _ABSENT)
+        except TypeError:
+            current = self.installed
+        if self.patcher is not None:
+            self.patcher.stop()
+            if current is _ABSENT:
+                with contextlib.suppress(AttributeError):
+                    delattr(self.owner, self.attribute)
+            elif current is not self.installed:
+                setattr(self.owner, self.attribute, current)
+        elif current is self.installed:
+            setattr(self.owner, self.attribute, self.below)
+
+
+# Started patches of each attribute, by ``(id(owner), attribute)``, from the
+# bottom to the top layer.
+_patch_layers: dict[tuple[int, str], list[_LayeredPatch]] = {}
+
+
+class _RedundantPatches:
+    """
+    Plugin enabled by ``--mock-redundant-patches``, which reports the targets
+    patched by a mocker fixture while a mocker of a broader scope had patched
+    them already.
+    """
+
+    def __init__(self) -> None:
+        # Number of patches and of those with the same object as the patch
+        # below, by target and fixtures.
+        self.patches: Counter[tuple[str, str, str]] = Counter()
+        self.same: Counter[tuple[str, str, str]] = Counter()
+
+    def add(self, below: _LayeredPatch, scope: str | None, same: bool) -> None:
+        key = (
+            _describe_target(below.owner, below.attribute),
+            _MOCKER_FIXTURES.get(below.scope or "", "MockerFixture"),
+            _MOCKER_FIXTURES.get(scope or "", "MockerFixture"),
+        )
+        self.patches[key] += 1
+        if same:
+            self.same[key] += 1
+
+    def pytest_terminal_summary(self, terminalreporter: Any) -> None:
+        tr = terminalreporter
+        tr.write_sep("=", "pytest-mock redundant patches")
+        if not self.patches:
+            tr.write_line("no target was patched again by a narrower mocker")
+            return
+        for key, count in self.patches.most_common():
+            target, upper, lower = key
+            same = (
+                f" ({self.same[key]}x with the same object)" if self.same[key] else ""
+            )
+            tr.write_line(
+                f"{count:6}x {target}: patched by {upper}, again by {lower}{same}"
+            )
+
+
+_redundant_patches: _RedundantPatches | None = None
+
+
+class TargetCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    currsize: int
+
+
+@dataclass
+class _TargetCache:
+    """
+    Cache the objects which own the attributes patched by ``mocker.patch``,
+    keyed by their dotted name, so the same targets are not imported and
+    resolved again in every test.
+
+    Entries store the module part of the name and the attributes to get from
+    it: they are only used while the module is the same object found in
+    ``sys.modules``, and the attributes are fetched again on every lookup, so
+    reloading or re-importing a module is picked up.
+    """
+
+    entries: dict[str, tuple[str, types.ModuleType, tuple[str, ...]]] = field(
+        default_factory=dict
+    )
+    hits: int = 0
+    misses: int = 0
+
+    def resolve(self, name: str) -> Any:
+        entry = self.entries.get(name)
+        if entry is not None:
+            module_name, module, attributes = entry
+            if sys.modules.get(module_name) is module:
+                self.hits += 1
+                obj: Any = module
+                for attribute in attributes:
+                    obj = getattr(obj, attribute)
+                return obj
+
+        self.misses += 1
+        # Same algorithm as ``pkgutil.resolve_name`` (which is what the mock
+        # module uses), but keeping track of where the module part ends.
+        if ":" in name:
+            # "package.module:object.attribute" says where the module ends.
+            module_name, _, qualname = name.partition(":")
+            module = importlib.import_module(module_name)
+            parts = qualname.split(".") if qualname else []
+        else:
+            parts = name.split(".")
+            module_name = parts.pop(0)
+            module = importlib.import_module(module_name)
+            while parts:
+                submodule_name = f"{module_name}.{parts[0]}"
+                try:
+                    module = importlib.import_module(submodule_name)
+                except ImportError:
+                    break
+                parts.pop(0)
+                module_name = submodule_name
+        obj = module
+        for attribute in parts:
+            obj = getattr(obj, attribute)
+        self.entries[name] = (module_name, module, tuple(parts))
+        return obj
+
+    def info(self) -> TargetCacheInfo:
+        return TargetCacheInfo(self.hits, self.misses, len(self.entries))
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.hits = self.misses = 0
+
+
+_target_cache = _TargetCache()
+
+
+def _describe_target(target: object, attribute: str | None = None) -> str:
+    """Return a readable name for a patch target, used in reports."""
+    if isinstance(target, str):
+        name = target
+    elif isinstance(target, types.ModuleType):
+        name = target.__name__
+    elif isinstance(getattr(target, "__qualname__", None), str):
+        name = f"{getattr(target, '__module__', None)}.{target.__qualname__}"  # type:ignore[attr-defined]
+    else:
+        name = f"<{type(target).__module__}.{type(target).__qualname__} object>"
+    return name if attribute is None else f"{name}.{attribute}"
+
+
+@dataclass
+class _ProfileStats:
+    count: int = 0
+    total: float = 0.0
+
+    def add(self, elapsed: float) -> None:
+        self.count += 1
+        self.total += elapsed
+
+
+class _MockProfiler:
+    """
+    Plugin enabled by ``--mock-profile``, which measures the time spent by
+    pytest-mock operations and reports the most expensive targets and tests.
+
+    With pytest-xdist, each worker sends its measurements to the controller,
+    which reports the measurements of all workers.
+    """
+
+    def __init__(self, top: int, json_path: str | None) -> None:
+        self.top = top
+        self.json_path = json_path
+        self.current_test: str | None = None
+        self.tests: dict[str, _ProfileStats] = {}
+        self.targets: dict[tuple[str, str], _ProfileStats] = {}
+        self.workers = 0
+        self._depth = 0
+
+    @contextlib.contextmanager
+    def measure(self, kind: str, target: str) -> Generator[None, None, None]:
+        # Only measure top-level operations (``spy`` patches the spied
+        # method using ``patch.object`` for example).
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._depth -= 1
+            if self._depth == 0:
+                self.record(kind, target, elapsed)
+
+    def record(self, kind: str, target: str, elapsed: float) -> None:
+        test = self.current_test or "<outside of tests>"
+        self.tests.setdefault(test, _ProfileStats()).add(elapsed)
+        self.targets.setdefault((kind, target), _ProfileStats()).add(elapsed)
+
+    def pytest_runtest_logstart(self, nodeid: str) -> None:
+        self.current_test = nodeid
+
+    def pytest_runtest_logfinish(self, nodeid: str) -> None:
+        self.current_test = None
+
+    def as_json(self) -> dict[str, Any]:
+        return {
+            "tests": {
+                test: {"count": stats.count, "total": stats.total}
+                for test, stats in self.tests.items()
+            },
+            "targets": [
+                {
+                    "kind": kind,
+                    "target": target,
+                    "count": stats.count,
+                    "total": stats.total,
+                }
+                for (kind, target), stats in self.targets.items()
+            ],
+        }
+
+    def merge(self, data: dict[str, Any]) -> None:
+        """Add measurements given in the format returned by ``as_json``."""
+        for test, entry in data["tests"].items():
+            stats = self.tests.setdefault(test, _ProfileStats())
+            stats.count += entry["count"]
+            stats.total += entry["total"]
+        for entry in data["targets"]:
+            key = (entry["kind"], entry["target"])
+            stats = self.targets.setdefault(key, _ProfileStats())
+            stats.count += entry["count"]
+            stats.total += entry["total"]
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodedown(self, node: Any, error: Any) -> None:
+        # pytest-xdist controller: a worker finished.
+        data = getattr(node, "workeroutput", {}).get("pytest_mock_profile")
+        if data is not None:
+            self.merge(data)
+            self.workers += 1
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_sessionfinish(self, session: Any) -> None:
+        # trylast: higher-scoped mockers are torn down by pytest's own
+        # ``pytest_sessionfinish`` implementation.
+        workeroutput = getattr(session.config, "workeroutput", None)
+        if workeroutput is not None:
+            # pytest-xdist worker: the controller reports the measurements.
+            workeroutput["pytest_mock_profile"] = self.as_json()
+            return
+        if self.json_path is not None:
+            with open(self.json_path, "w", encoding="utf-8") as f:
+                json.dump(self.as_json(), f, indent=2)
+
+    def pytest_terminal_summary(self, terminalreporter: Any) -> None:
+        tr = terminalreporter
+        tr.write_sep("=", "pytest-mock profile")
+        total = sum(stats.total for stats in self.tests.values())
+        count = sum(stats.count for stats in self.tests.values())
+        workers = f" in {self.workers} workers" if self.workers else ""
+        tr.write_line(f"{count} operations took {total:.3f}s{workers}")
+        targets = sorted(self.targets.items(), key=lambda x: x[1].total, reverse=True)
+        tr.write_line("")
+        tr.write_line(f"slowest {self.top} targets:")
+        for (kind, target), stats in targets[: self.top]:
+            tr.write_line(
+                f"{stats.total * 1000:10.2f}ms {stats.count:6}x {kind:15} {target}"
+            )
+        tests = sorted(self.tests.items(), key=lambda x: x[1].total, reverse=True)
+        tr.write_line("")
+        tr.write_line(f"slowest {self.top} tests:")
+        for test, stats in tests[: self.top]:
+            tr.write_line(f"{stats.total * 1000:10.2f}ms {stats.count:6}x {test}")
+        if self.json_path is not None:
+            tr.write_line("")
+            tr.write_line(f"profile written to {self.json_path}")
+
+
+_mock_profiler: _MockProfiler | None = None
+
+
+def _profile(
+    kind: str, describe: Callable[[], str]
+) -> contextlib.AbstractContextManager[None]:
+    """
+    Measure the operation in the ``with`` block when ``--mock-profile`` is
+    enabled; ``describe`` is called to obtain the target only in that case.
+    """
+    if _mock_profiler is None:
+        return contextlib.nullcontext()
+    return _mock_profiler.measure(kind, describe())
+
+
+# Arguments which cannot be changed after a mock is created, all other keyword
+# arguments are applied again with ``configure_mock`` when a mock is reused.
+_POOL_CONSTRUCTOR_ARGS = frozenset(
+    ("spec", "spec_set", "wraps", "name", "parent", "unsafe")
+)
+
+
+@dataclass
+class _PooledMock:
+    key: Any
+    mock: Any
+    configure: dict[str, Any]
+    # State right after construction, restored when the mock is released.
+    instance_state: dict[str, Any] = field(repr=False)
+    type_state: dict[str, Any] = field(repr=False)
+
+    def recycle(self) -> None:
+        """Bring the mock back to the state it had right after construction."""
+        # Magic methods are configured on the class created for each mock.
+        cls = type(self.mock)
+        for name in [k for k in cls.__dict__ if k not in self.type_state]:
+            delattr(cls, name)
+        for name, value in self.type_state.items():
+            if cls.__dict__.get(name) is not value:
+                setattr(cls, name, value)
+
+        instance_dict = self.mock.__dict__
+        for name in [k for k in instance_dict if k not in self.instance_state]:
+            del instance_dict[name]
+        instance_dict.update(self.instance_state)
+        self.mock._mock_children.clear()
+        self.mock.reset_mock(return_value=True, side_effect=True)
+
+
+class _MockPool:
+    """
+    Session-wide pool of ``MagicMock`` and ``AsyncMock`` objects, enabled by
+    the ``mock_pool_size`` ini option.
+
+    Mocks are pooled by class and constructor arguments, and at most ``size``
+    idle mocks are kept for each of them.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.idle: dict[Any, list[_PooledMock]] = {}
+
+    def acquire(
+        self, mock_class: type[Any], kwargs: dict[str, Any]
+    ) -> _PooledMock | None:
+        """
+        Return a mock of ``mock_class`` created with ``kwargs``, or ``None``
+        when the arguments cannot be pooled (because they are not hashable).
+        """
+        key = (
+            mock_class,
+            tuple(sorted((name, type(value), value) for name, value in kwargs.items())),
+        )
+        try:
+            idle = self.idle.get(key)
+        except TypeError:
+            return None
+        if idle:
+            pooled = idle.pop()
+            pooled.mock.configure_mock(**pooled.configure)
+            return pooled
+
+        mock = mock_class(**kwargs)
+        return _PooledMock(
+            key,
+            mock,
+            configure={
+                name: value
+                for name, value in kwargs.items()
+                if name not in _POOL_CONSTRUCTOR_ARGS and not name.startswith("_")
+            },
+            instance_state=dict(mock.__dict__),
+            type_state=dict(type(mock).__dict__),
+        )
+
+    def release(self, pooled: _PooledMock) -> None:
+        idle = self.idle.setdefault(pooled.key, [])
+        if len(idle) < self.size:
+            pooled.recycle()
+            idle.append(pooled)
+
+
+_mock_pool: _MockPool | None = None
+
+
+class _PooledMockFactory:
+    """
+    Stands in for ``MagicMock`` and ``AsyncMock`` in ``mocker`` when the mock
+    pool is enabled, taking mocks from the pool instead of creating new ones.
+
+    Mocks created with positional or unhashable arguments are not pooled.
+    """
+
+    def __init__(
+        self, pool: _MockPool, mock_class: type[Any], acquired: list[_PooledMock]
+    ) -> None:
+        self._pool = pool
+        self._mock_class = mock_class
+        self._acquired = acquired
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        pooled = None if args else self._pool.acquire(self._mock_class, kwargs)
+        if pooled is None:
+            return self._mock_class(*args, **kwargs)
+        self._acquired.append(pooled)
+        return pooled.mock
+
+    # Keep ``isinstance(m, mocker.MagicMock)`` and friends working.
+    def __instancecheck__(self, instance: object) -> bool:
+        return isinstance(instance, self._mock_class)
+
+    def __subclasscheck__(self, subclass: type[Any]) -> bool:
+        return issubclass(subclass, self._mock_class)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._mock_class, name)
+
+    def __repr__(self) -> str:
+        return f"<pooled {self._mock_class!r}>"
+
+
+# Path of the mock which recorded an entry of ``mock_calls``, relative to the
+# root mock: ``"a.b().c"`` is ``("a", "b", "()", "c")``.
+_CALL_PATH_RE = re.compile(r"\(\)|[^.()]+")
+
+# ``side_effect`` iterables are stored as iterators and consumed by calls, so
+# we keep a copy of the iterators which can be copied cheaply.
+_COPYABLE_ITERATORS: tuple[type[Any], ...] = (type(iter([])), type(iter(())))
+
+
+def _copy_side_effect(side_effect: Any) -> Any:
+    if isinstance(side_effect, _COPYABLE_ITERATORS):
+        return copy.copy(side_effect)
+    return side_effect
+
+
+def _raw_return_value(mock: Any) -> Any:
+    # Accessing ``return_value`` would create a child mock when it is not set.
+    delegate = mock._mock_delegate
+    if delegate is not None:
+        return delegate.return_value
+    return mock._mock_return_value
+
+
+def _truncate(calls: MutableSequence[Any], length: int) -> None:
+    while len(calls) > length:
+        calls.pop()
+
+
+def _restore_list(
+    obj: Any, name: str, calls: MutableSequence[Any], length: int
+) -> None:
+    """
+    Put back the list captured in a snapshot, which ``reset_mock()`` might
+    have replaced by a new one, and drop what was appended to it since.
+    """
+    if getattr(obj, name) is not calls:
+        setattr(obj, name, calls)
+    _truncate(calls, length)
+
+
+@dataclass
+class _MockNodeState:
+    """State of a single mock in a mock tree, captured by ``mocker.snapshot()``."""
+
+    mock: Any
+    called: bool
+    call_count: int
+    call_args: Any
+    # The call lists and their lengths: calls are only appended to them, so
+    # truncating them restores their contents.
+    call_args_list: list[Any]
+    call_args_list_length: int
+    mock_calls: list[Any]
+    mock_calls_length: int
+    method_calls: list[Any]
+    method_calls_length: int
+    return_value: Any
+    side_effect: Any
+    children: dict[str, Any]
+    # The ``__dict__`` of the mock and its raw side effect, which
+    # ``side_effect`` might be a copy of, to tell cheaply if it was configured.
+    mock_dict: dict[str, Any] = field(default_factory=dict)
+    raw_side_effect: Any = None
+    await_count: int | None = None
+    await_args: Any = None
+    await_args_list: list[Any] = field(default_factory=list)
+    await_args_list_length: int = 0
+
+    @classmethod
+    def capture(cls, mock: Any) -> _MockNodeState:
+        state = cls(
+            mock=mock,
+            called=mock.called,
+            call_count=mock.call_count,
+            call_args=mock.call_args,
+            call_args_list=mock.call_args_list,
+            call_args_list_length=len(mock.call_args_list),
+            mock_calls=mock.mock_calls,
+            mock_calls_length=len(mock.mock_calls),
+            method_calls=mock.method_calls,
+            method_calls_length=len(mock.method_calls),
+            return_value=_raw_return_value(mock),
+            side_effect=_copy_side_effect(mock.side_effect),
+            children=dict(mock._mock_children),
+            mock_dict=vars(mock),
+        )
+        state.raw_side_effect = state.current_side_effect()
+        if hasattr(type(mock), "await_args_list"):
+            state.await_count = mock.await_count
+            state.await_args = mock.await_args
+            state.await_args_list = mock.await_args_list
+            state.await_args_list_length = len(mock.await_args_list)
+        return state
+
+    def current_side_effect(self) -> Any:
+        if self.mock_dict.get("_mock_delegate", _ABSENT) is None:
+            return self.mock_dict.get("_mock_side_effect")
+        return self.mock.side_effect
+
+    def configured(self) -> bool:
+        """
+        Return whether the ``return_value``, ``side_effect`` or children of the
+        mock were changed since the snapshot, which calls do not tell.
+        """
+        # Looking up attributes of mocks is slow, as each has its own class.
+        mock_dict = self.mock_dict
+        if mock_dict.get("_mock_delegate", _ABSENT) is None:
+            if (
+                mock_dict.get("_mock_return_value", self.return_value)
+                is not self.return_value
+                or mock_dict.get("_mock_side_effect") is not self.raw_side_effect
+            ):
+                return True
+            children = mock_dict["_mock_children"]
+        else:
+            # Autospecced mocks, whose attributes are those of a delegate.
+            mock = self.mock
+            if (
+                _raw_return_value(mock) is not self.return_value
+                or mock.side_effect is not self.raw_side_effect
+            ):
+                return True
+            children = mock._mock_children
+        if len(children) != len(self.children):
+            return True
+        for name, child in self.children.items():
+            if children.get(name) is not child:
+                return True
+        return False
+
+    def restore(self) -> None:
+        mock = self.mock
+        _restore_list(
+            mock, "call_args_list", self.call_args_list, self.call_args_list_length
+        )
+        _restore_list(mock, "mock_calls", self.mock_calls, self.mock_calls_length)
+        _restore_list(mock, "method_calls", self.method_calls, self.method_calls_length)
+        mock.called = self.called
+        mock.call_count = self.call_count
+        mock.call_args = self.call_args
+        mock.return_value = self.return_value
+        mock.side_effect = _copy_side_effect(self.side_effect)
+        self.raw_side_effect = self.current_side_effect()
+        if self.await_count is not None:
+            _restore_list(
+                mock,
+                "await_args_list",
+                self.await_args_list,
+                self.await_args_list_length,
+            )
+            mock.await_count = self.await_count
+            mock.await_args = self.await_args
+
+        children = mock._mock_children
+        magics_removed = False
+        for name in [n for n in children if n not in self.children]:
+            del children[name]
+            # Magic methods are also installed in the class of the mock.
+            if name.startswith("__") and name.endswith("__"):
+                vars(mock).pop(name, None)
+                if name in vars(type(mock)):
+                    delattr(type(mock), name)
+                magics_removed = True
+        for name, child in self.children.items():
+            if children.get(name) is not child:
+                children[name] = child
+        if magics_removed and hasattr(mock, "_mock_set_magics"):
+            # Install the lazy magic methods of MagicMock again.
+            mock._mock_set_magics()
+
+
+_SPY_ATTRIBUTES = ("spy_return", "spy_return_iter", "spy_exception")
+
+
+@dataclass
+class _MockTreeSnapshot:
+    """
+    State of a mock registered by ``mocker`` and all its child mocks, keyed by
+    their path from the root mock.
+    """
+
+    obj: Any
+    root: Any
+    mock_calls: Any
+    length: int
+    nodes: dict[tuple[str, ...], _MockNodeState]
+    spy_attributes: dict[str, Any]
+    spy_return_list: MutableSequence[Any] | None
+    spy_return_list_length: int
+
+    @classmethod
+    def capture(cls, obj: Any, root: Any, mock_class: type[Any]) -> _MockTreeSnapshot:
+        nodes = {}
+        seen = set()
+        pending: list[tuple[tuple[str, ...], Any]] = [((), root)]
+        while pending:
+            path, mock = pending.pop()
+            if id(mock) in seen:
+                continue
+            seen.add(id(mock))
+            nodes[path] = _MockNodeState.capture(mock)
+            for name, child in mock._mock_children.items():
+                if isinstance(child, mock_class):
+                    pending.append(((*path, name), child))
+            return_value = _raw_return_value(mock)
+            if (
+                isinstance(return_value, mock_class)
+                and return_value._mock_new_parent is mock
+            ):
+                pending.append(((*path, "()"), return_value))
+
+        # Look in __dict__: getattr() would create child mocks on plain mocks.
+        obj_dict = vars(obj)
+        spy_return_list = obj_dict.get("spy_return_list")
+        return cls(
+            obj=obj,
+            root=root,
+            mock_calls=root.mock_calls,
+            length=len(root.mock_calls),
+            nodes=nodes,
+            spy_attributes={
+                name: obj_dict[name] for name in _SPY_ATTRIBUTES if name in obj_dict
+            },
+            spy_return_list=spy_return_list,
+            spy_return_list_length=len(spy_return_list or ()),
+        )
+
+    def _dirty_paths(self) -> list[tuple[str, ...]]:
+        """
+        Return the paths of the mocks which might have changed since the
+        snapshot, parents first (the root mock is always included).
+
+        Every call made to a mock in the tree is also recorded in the
+        ``mock_calls`` of the root mock, so the calls made since the snapshot
+        tell us which mocks were used, as long as ``reset_mock()`` was not
+        called in the meantime. Mocks configured without being called are
+        found by comparing their attributes to the snapshot.
+        """
+        mock_calls = self.root.mock_calls
+        if mock_calls is not self.mock_calls or len(mock_calls) < self.length:
+            return list(self.nodes)
+        dirty: set[tuple[str, ...]] = {()}
+        for entry in mock_calls[self.length :]:
+            path = tuple(_CALL_PATH_RE.findall(entry[0]))
+            dirty.update(path[:i] for i in range(1, len(path) + 1))
+        dirty.update(
+            path
+            for path, state in self.nodes.items()
+            if path not in dirty and state.configured()
+        )
+        return sorted(dirty, key=len)
+
+    def restore(self) -> None:
+        for path in self._dirty_paths():
+            # Mocks created since the snapshot are discarded by their parents.
+            state = self.nodes.get(path)
+            if state is not None:
+                state.restore()
+
+        for name, value in self.spy_attributes.items():
+            setattr(self.obj, name, value)
+        if self.spy_return_list is not None:
+            _restore_list(
+                self.obj,
+                "spy_return_list",
+                self.spy_return_list,
+                self.spy_return_list_length,
+            )
+
+
+@dataclass
+class _FastSpySnapshot:
+    spy: _FastSpy
+    call_args_list: list[Any]
+    call_args_list_length: int
+    await_args_list: list[Any]
+    await_args_list_length: int
+    spy_attributes: dict[str, Any]
+    spy_return_list: MutableSequence[Any]
+    spy_return_list_length: int
+
+    def restore(self) -> None:
+        spy = self.spy
+        _restore_list(
+            spy, "call_args_list", self.call_args_list, self.call_args_list_length
+        )
+        _restore_list(
+            spy, "await_args_list", self.await_args_list, self.await_args_list_length
+        )
+        for name, value in self.spy_attributes.items():
+            setattr(spy, name, value)
+        _restore_list(
+            spy,
+            "spy_return_list",
+            self.spy_return_list,
+            self.spy_return_list_length,
+        )
+        # The mock built for assertions would still have the discarded calls.
+        spy._view = None
+
+
+@dataclass
+class MockSnapshot:
+    """
+    State of the mocks registered by a ``mocker`` fixture, returned by
+    ``mocker.snapshot()`` and rolled back by ``mocker.restore()``.
+    """
+
+    trees: list[_MockTreeSnapshot | _FastSpySnapshot] = field(repr=False)
+
+
+_CALL_LOG_FORMATS = ("jsonl", "pickle")
+
+
+def _call_log_format(path: str, format: str | None) -> str:
+    if format is None:
+        suffix = os.path.splitext(path)[1]
+        return "pickle" if suffix in (".pickle", ".pkl") else "jsonl"
+    if format not in _CALL_LOG_FORMATS:
+        raise ValueError(
+            f"format must be one of {', '.join(map(repr, _CALL_LOG_FORMATS))}, "
+            f"got {format!r}"
+        )
+    return format
+
+
+def _pickle_errors() -> tuple[type[Exception], ...]:
+    """Errors raised by pickle for objects which cannot be pickled."""
+    import pickle
+
+    return (pickle.PicklingError, TypeError, AttributeError)
+
+
+def _picklable(obj: Any) -> Any:
+    import pickle
+
+    try:
+        pickle.dumps(obj)
+    except _pickle_errors():
+        return repr(obj)
+    return obj
+
+
+class LoggedCall(NamedTuple):
+    """A call read back from a :class:`CallLog` file."""
+
+    args: tuple[Any, ...]
+    kwargs: dict[str, Any]
+    return_value: Any
+    exception: Any
+    timestamp: float
+
+
+class CallLog:
+    """
+    Append-only file where ``mocker.spy(..., sink=...)`` and
+    ``mocker.record_calls()`` write the calls they see, so they do not have to
+    be kept in memory. Only the ``calls`` and ``exceptions`` counters are.
+
+    The file is written in JSON lines (values which are not JSON serializable
+    are written as their ``repr``), or with pickle if ``format="pickle"`` or
+    the file name ends with ``.pickle`` or ``.pkl`` (values which cannot be
+    pickled are written as their ``repr``).
+
+    Iterating over the log replays the recorded calls as :class:`LoggedCall`
+    objects.
+    """
+
+    def __init__(self, path: str | os.PathLike[str], format: str | None = None) -> None:
+        self.path = os.fspath(path)
+        self.format = _call_log_format(self.path, format)
+        self.calls = 0
+        self.exceptions = 0
+        self._file = open(self.path, "ab")  # noqa: SIM115
+        # Undo the recording set up by the mocker, when stopped.
+        self._on_stop: list[Callable[[], None]] = []
+        self._on_reset: Callable[[], None] | None = None
+
+    def write(
+        self,
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+        return_value: Any,
+        exception: BaseException | None,
+        timestamp: float,
+    ) -> None:
+        """Append a call to the log."""
+        self.calls += 1
+        if exception is not None:
+            self.exceptions += 1
+        if self.format == "pickle":
+            import pickle
+
+            record: tuple[Any, ...] = (args, kwargs, return_value, exception, timestamp)
+            try:
+                data = pickle.dumps(record)
+            except _pickle_errors():
+                data = pickle.dumps(
+                    (
+                        tuple(map(_picklable, args)),
+                        {key: _picklable(value) for key, value in kwargs.items()},
+                        _picklable(return_value),
+                        _picklable(exception),
+                        timestamp,
+                    )
+                )
+        else:
+            fields = {
+                "args": args,
+                "kwargs": kwargs,
+                "return_value": return_value,
+                "exception": None if exception is None else repr(exception),
+                "timestamp": timestamp,
+            }
+            try:
+                line = json.dumps(fields, default=repr)
+            except (TypeError, ValueError):
+                # For example, dicts with keys which are not strings.
+                for name in ("args", "kwargs", "return_value"):
+                    try:
+                        json.dumps(fields[name], default=repr)
+                    except (TypeError, ValueError):
+                        fields[name] = repr(fields[name])
+                line = json.dumps(fields, default=repr)
+            data = line.encode("utf-8") + b"\n"
+        self._file.write(data)
+
+    def flush(self) -> None:
+        if not self._file.closed:
+            self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def stop(self) -> None:
+        """Stop recording calls and close the file."""
+        while self._on_stop:
+            self._on_stop.pop()()
+        self.close()
+
+    def __iter__(self) -> Iterator[LoggedCall]:
+        self.flush()
+        return read_call_log(self.path, self.format)
+
+    def __repr__(self) -> str:
+        return f"<CallLog {self.path!r} calls={self.calls}>"
+
+
+def read_call_log(
+    path: str | os.PathLike[str], format: str | None = None
+) -> Iterator[LoggedCall]:
+    """
+    Replay the calls written to a :class:`CallLog` file, in the order they were
+    made. The format is detected from the file name like in :class:`CallLog`.
+
+    Pickle logs should only be read if they come from a trusted source.
+    """
+    path = os.fspath(path)
+    if _call_log_format(path, format) == "pickle":
+        import pickle
+
+        with open(path, "rb") as f:
+            while True:
+                try:
+                    args, kwargs, return_value, exception, timestamp = pickle.load(f)
+                except EOFError:
+                    return
+                yield LoggedCall(args, kwargs, return_value, exception, timestamp)
+    else:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                fields = json.loads(line)
+                yield LoggedCall(
+                    tuple(fields["args"]),
+                    fields["kwargs"],
+                    fields["return_value"],
+                    fields["exception"],
+                    fields["timestamp"],
+                )
+
+
+# Modes of ``mocker.record``: "once" replays the cassette if it exists, and
+# records it otherwise.
+_CASSETTE_MODES = ("once", "record", "replay")
+
+
+class _Cassette(CallLog):
+    """
+    Pickle :class:`CallLog` written by ``mocker.record``. Calls which cannot
+    be pickled are left out with a warning, rather than written as their
+    ``repr``, as that would be replayed in place of the actual values.
+    """
+
+    def __init__(self, path: str, drop_instance: bool = False) -> None:
+        super().__init__(path, "pickle")
+        # Methods recorded on a class get the instance as first argument,
+        # which is left out as it would not match on replay.
+        self.drop_instance = drop_instance
+
+    def write(
+        self,
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+        return_value: Any,
+        exception: BaseException | None,
+        timestamp: float,
+    ) -> None:
+        import pickle
+
+        if self.drop_instance:
+            args = args[1:]
+        try:
+            pickle.dumps((args, kwargs, return_value, exception))
+        except _pickle_errors() as e:
+            warnings.warn(
+                PytestMockWarning(f"call not recorded to cassette {self.path}: {e}"),
+                stacklevel=2,
+            )
+            return
+        super().write(args, kwargs, return_value, exception, timestamp)
+
+
+def _arguments_key(
+    signature: inspect.Signature | None, args: tuple[Any, ...], kwargs: dict[str, Any]
+) -> Any:
+    """
+    Return the key of a call in a cassette or memoization cache, or ``None``
+    if its arguments are not hashable. Arguments are bound to the signature
+    of the function, so that ``f(1, b=2)`` and ``f(1, 2)`` (and ``f(1)``, if
+    2 is the default of ``b``) have the same key.
+    """
+    if signature is not None:
+        try:
+            bound = signature.bind(*args, **kwargs)
+        except TypeError:
+            pass
+        else:
+            bound.apply_defaults()
+            args, kwargs = bound.args, bound.kwargs
+    try:
+        # The keyword arguments are not tagged as a dict, so calls without
+        # them have the same keys as the ones made by ``Memoized.__call__``.
+        key = (_freeze(args), frozenset((k, _freeze(v)) for k, v in kwargs.items()))
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+class MemoizeInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    maxsize: int | None
+    currsize: int
+
+
+# Marks a key missing from a ``_MemoizeStore``.
+_NOT_CACHED = object()
+_NO_KWARGS: frozenset[Any] = frozenset()
+
+
+class _MemoizeStore:
+    """
+    Results cached by ``mocker.memoize``, with the "lru" policy: when full,
+    the least recently used result is evicted.
+    """
+
+    def __init__(self, maxsize: int | None, ttl: float | None) -> None:
+        self.maxsize = maxsize
+        self.evictions = 0
+        self.values: dict[Any, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def get(self, key: Any) -> Any:
+        value = self.values.pop(key, _NOT_CACHED)
+        if value is not _NOT_CACHED:
+            self.values[key] = value
+        return value
+
+    def put(self, key: Any, value: Any) -> None:
+        # Threads missing the same key at once both put it.
+        if key in self.values:
+            del self.values[key]
+        elif self.maxsize is not None and len(self.values) >= self.maxsize:
+            del self.values[next(iter(self.values))]
+            self.evictions += 1
+        self.values[key] = value
+
+    def clear(self) -> None:
+        self.values.clear()
+
+
+class _LFUMemoizeStore(_MemoizeStore):
+    """
+    The "lfu" policy: when full, the least frequently used result is evicted
+    (the least recently used one among those used as often).
+    """
+
+    def __init__(self, maxsize: int | None, ttl: float | None) -> None:
+        super().__init__(maxsize, ttl)
+        self.uses: dict[Any, int] = {}
+        # Keys by number of uses, in the order they were last used.
+        self.by_uses: dict[int, dict[Any, None]] = {}
+        self.min_uses = 0
+
+    def _use(self, key: Any, uses: int) -> None:
+        self.uses[key] = uses
+        self.by_uses.setdefault(uses, {})[key] = None
+
+    def _unuse(self, key: Any) -> int:
+        uses = self.uses.pop(key)
+        keys = self.by_uses[uses]
+        del keys[key]
+        if not keys:
+            del self.by_uses[uses]
+        return uses
+
+    def get(self, key: Any) -> Any:
+        value = self.values.get(key, _NOT_CACHED)
+        if value is not _NOT_CACHED:
+            uses = self._unuse(key)
+            if self.min_uses == uses and uses not in self.by_uses:
+                self.min_uses = uses + 1
+            self._use(key, uses + 1)
+        return value
+
+    def put(self, key: Any, value: Any) -> None:
+        if key in self.values:
+            self.values[key] = value
+            return
+        if self.maxsize is not None and len(self.values) >= self.maxsize:
+            evicted = next(iter(self.by_uses[self.min_uses]))
+            self._unuse(evicted)
+            del self.values[evicted]
+            self.evictions += 1
+        self.values[key] = value
+        self._use(key, 1)
+        self.min_uses = 1
+
+    def clear(self) -> None:
+        super().clear()
+        self.uses.clear()
+        self.by_uses.clear()
+
+
+class _TTLMemoizeStore(_MemoizeStore):
+    """
+    The "ttl" policy: results expire ``ttl`` seconds after they were cached,
+    and when full, the oldest result is evicted.
+    """
+
+    def __init__(self, maxsize: int | None, ttl: float | None) -> None:
+        super().__init__(maxsize, ttl)
+        assert ttl is not None
+        self.ttl = ttl
+        # Results in the order they expire, as all of them live as long.
+        self.expires: dict[Any, float] = {}
+
+    def get(self, key: Any) -> Any:
+        expires = self.expires.get(key)
+        if expires is None:
+            return _NOT_CACHED
+        if expires <= time.monotonic():
+            self._evict(key)
+            return _NOT_CACHED
+        return self.values[key]
+
+    def _evict(self, key: Any) -> None:
+        del self.values[key]
+        del self.expires[key]
+        self.evictions += 1
+
+    def put(self, key: Any, value: Any) -> None:
+        now = time.monotonic()
+        for oldest, expires in list(self.expires.items()):
+            if expires > now:
+                break
+            self._evict(oldest)
+        if key in self.values:
+            # Cached again: it now expires last.
+            del self.expires[key]
+        elif self.maxsize is not None and len(self.values) >= self.maxsize:
+            self._evict(next(iter(self.expires)))
+        self.values[key] = value
+        self.expires[key] = now + self.ttl
+
+    def clear(self) -> None:
+        super().clear()
+        self.expires.clear()
+
+
+_MEMOIZE_POLICIES: dict[str, type[_MemoizeStore]] = {
+    "lru": _MemoizeStore,
+    "lfu": _LFUMemoizeStore,
+    "ttl": _TTLMemoizeStore,
+}
+
+
+class Memoized:
+    """
+    Caching wrapper installed by ``mocker.memoize``, calling the original
+    function only for arguments it was not called with before. Exceptions
+    are not cached.
+    """
+
+    __wrapped__: Callable[..., Any]
+
+    def __init__(
+        self,
+        func: Callable[..., Any],
+        maxsize: int | None,
+        policy: str,
+        ttl: float | None,
+        bind: bool,
+    ) -> None:
+        functools.update_wrapper(self, func)
+        try:
+            self._signature: inspect.Signature | None = inspect.signature(func)
+        except (TypeError, ValueError):
+            self._signature = None
+        # Calls giving all the parameters positionally have a canonical key
+        # already, which saves binding them to the signature.
+        self._positional = -1
+        if self._signature is not None:
+            kinds = {p.kind for p in self._signature.parameters.values()}
+            if kinds <= {
+                inspect.Parameter.POSITIONAL_ONLY,
+                inspect.Parameter.POSITIONAL_OR_KEYWORD,
+            }:
+                self._positional = len(self._signature.parameters)
+        self._store = _MEMOIZE_POLICIES[policy](maxsize, ttl)
+        self._bind = bind
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __get__(self, obj: Any, objtype: Any = None) -> Any:
+        # Replacing a method, which must be bound to the instance.
+        if obj is None or not self._bind:
+            return self
+        return types.MethodType(self, obj)
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        key: Any = None
+        # Hashable arguments are frozen to themselves (see ``_freeze``).
+        if not kwargs and len(args) == self._positional:
+            key = (args, _NO_KWARGS)
+            try:
+                hash(key)
+            except TypeError:
+                key = None
+        if key is None:
+            key = _arguments_key(self._signature, args, kwargs)
+        with self._lock:
+            value = _NOT_CACHED if key is None else self._store.get(key)
+            if value is not _NOT_CACHED:
+                self.hits += 1
+                return value
+            self.misses += 1
+        value = self.__wrapped__(*args, **kwargs)
+        if key is not None:
+            with self._lock:
+                self._store.put(key, value)
+        return value
+
+    def cache_info(self) -> MemoizeInfo:
+        """Return the hits, misses, evictions and size of the cache."""
+        return MemoizeInfo(
+            self.hits,
+            self.misses,
+            self._store.evictions,
+            self._store.maxsize,
+            len(self._store),
+        )
+
+    def cache_clear(self) -> None:
+        """Remove all the results from the cache."""
+        with self._lock:
+            self._store.clear()
+
+    def __repr__(self) -> str:
+        return f"<Memoized {self.__wrapped__!r} {self.cache_info()}>"
+
+
+class _DiscardedCalls(list[Any]):
+    """Call list used while a :class:`CallLog` records the calls instead."""
+
+    def append(self, item: Any) -> None:
+        pass
+
+
+def _discard_calls(obj: Any, log: CallLog) -> None:
+    """
+    Stop keeping the calls of the given mock in memory (the counters and the
+    last call are still kept), until the log is stopped.
+    """
+    # Autospecced functions keep their mock in the ``mock`` attribute, and
+    # the mock delegates its call lists to the function.
+    root = cast(Any, obj).mock if isinstance(obj, types.FunctionType) else obj
+    saved = (obj.call_args_list, obj.mock_calls, root.method_calls)
+
+    def discard() -> None:
+        obj.call_args_list = _DiscardedCalls()
+        obj.mock_calls = _DiscardedCalls()
+        root.method_calls = _DiscardedCalls()
+
+    def reset() -> None:
+        # ``reset_mock`` replaced the lists.
+        nonlocal saved
+        saved = (obj.call_args_list, obj.mock_calls, root.method_calls)
+        discard()
+
+    def undo() -> None:
+        obj.call_args_list, obj.mock_calls, root.method_calls = saved
+
+    discard()
+    log._on_reset = reset
+    log._on_stop.append(undo)
 
 
 class MockerFixture:
@@ -94,6 +2053,7 @@ class MockerFixture:
 
     def __init__(self, config: Any) -> None:
         self._mock_cache: MockCache = MockCache()
+        self._pooled_mocks: list[_PooledMock] = []
         self.mock_module = mock_module = get_mock_module(config)
         self.patch = self._Patcher(self._mock_cache, mock_module)  # type: MockerFixture._Patcher
         # aliases for convenience
@@ -104,6 +2064,14 @@ class MockerFixture:
         self.PropertyMock = mock_module.PropertyMock
         if hasattr(mock_module, "AsyncMock"):
             self.AsyncMock = mock_module.AsyncMock
+        if _mock_pool is not None:
+            self.MagicMock = _PooledMockFactory(
+                _mock_pool, mock_module.MagicMock, self._pooled_mocks
+            )
+            if hasattr(mock_module, "AsyncMock"):
+                self.AsyncMock = _PooledMockFactory(
+                    _mock_pool, mock_module.AsyncMock, self._pooled_mocks
+                )
         self.call = mock_module.call
         self.ANY = mock_module.ANY
         self.DEFAULT = mock_module.DEFAULT
@@ -115,9 +2083,10 @@ class MockerFixture:
     def create_autospec(
         self, spec: Any, spec_set: bool = False, instance: bool = False, **kwargs: Any
     ) -> MockType:
-        m: MockType = self.mock_module.create_autospec(
-            spec, spec_set, instance, **kwargs
-        )
+        with _profile("create_autospec", lambda: _describe_target(spec)):
+            m: MockType = self.mock_module.create_autospec(
+                spec, spec_set, instance, **kwargs
+            )
         self._mock_cache.add(m)
         return m
 
@@ -142,9 +2111,23 @@ class MockerFixture:
                 continue
             # NOTE: The mock may be a dictionary
             if hasattr(mock_item.mock, "spy_return_list"):
-                mock_item.mock.spy_return_list = []
+                old_list = mock_item.mock.spy_return_list
+                if isinstance(old_list, _ConcurrentReturnList):
+                    mock_item.mock.spy_return_list = _ConcurrentReturnList(
+                        old_list.maxlen
+                    )
+                elif isinstance(old_list, _BoundedReturnList):
+                    mock_item.mock.spy_return_list = _BoundedReturnList(
+                        maxlen=old_list.maxlen
+                    )
+                else:
+                    mock_item.mock.spy_return_list = []
             if hasattr(mock_item.mock, "spy_return_iter"):
                 mock_item.mock.spy_return_iter = None
+            if _own_attribute(mock_item.mock, "spy_latencies") is not None:
+                mock_item.mock.spy_max_concurrency = 0
+                mock_item.mock.spy_latencies.clear()
+                mock_item.mock.spy_task_calls.clear()
             if isinstance(mock_item.mock, supports_reset_mock_with_args):
                 mock_item.mock.reset_mock(
                     return_value=return_value, side_effect=side_effect
@@ -152,6 +2135,60 @@ class MockerFixture:
             else:
                 mock_item.mock.reset_mock()
 
+        # reset_mock() replaced the call lists of mocks recorded to a call log.
+        for mock_item in self._mock_cache:
+            if isinstance(mock_item.patch, CallLog) and mock_item.patch._on_reset:
+                mock_item.patch._on_reset()
+
+    def snapshot(self) -> MockSnapshot:
+        """
+        Capture the state of all mocks registered by this fixture, so it can be
+        rolled back later with :meth:`restore`.
+        """
+        mock_class = self.mock_module.NonCallableMock
+        trees: list[_MockTreeSnapshot | _FastSpySnapshot] = []
+        for mock_item in self._mock_cache:
+            # NOTE: The mock may be a dictionary (patch.multiple and patch.many)
+            if isinstance(mock_item.mock, dict):
+                objs = list(mock_item.mock.values())
+            else:
+                objs = [mock_item.mock]
+            for obj in objs:
+                if isinstance(obj, _FastSpy):
+                    trees.append(
+                        _FastSpySnapshot(
+                            obj,
+                            obj.call_args_list,
+                            len(obj.call_args_list),
+                            obj.await_args_list,
+                            len(obj.await_args_list),
+                            {name: getattr(obj, name) for name in _SPY_ATTRIBUTES},
+                            obj.spy_return_list,
+                            len(obj.spy_return_list),
+                        )
+                    )
+                    continue
+                # Autospecced functions keep their mock in the ``mock`` attribute.
+                root: Any = obj
+                if isinstance(obj, types.FunctionType):
+                    root = cast(Any, obj).mock
+                if isinstance(root, mock_class):
+                    trees.append(_MockTreeSnapshot.capture(obj, root, mock_class))
+        return MockSnapshot(trees)
+
+    def restore(self, snapshot: MockSnapshot) -> None:
+        """
+        Roll back the mocks captured by :meth:`snapshot` to the state they had
+        at that point: calls, ``return_value``, ``side_effect`` and child mocks
+        created since then.
+
+        Only the mocks which were called since the snapshot (and the root mocks)
+        are restored, so the cost depends on the number of calls made rather
+        than on the size of the mock trees.
+        """
+        for tree in snapshot.trees:
+            tree.restore()
+
     def stopall(self) -> None:
         """
         Stop all patchers started by this fixture. Can be safely called multiple
@@ -159,74 +2196,581 @@ class MockerFixture:
         """
         self._mock_cache.clear()
 
-    def stop(self, mock: unittest.mock.MagicMock) -> None:
+    def stop(self, mock: object) -> None:
         """
         Stops a previous patch or spy call by passing the ``MagicMock`` object
-        returned by it.
+        (or any other object) returned by it.
         """
         self._mock_cache.remove(mock)
 
-    def spy(self, obj: object, name: str, duplicate_iterators: bool = False) -> SpyType:
+    def _release_pooled_mocks(self) -> None:
+        """Return the mocks taken from the mock pool by this fixture."""
+        if _mock_pool is None:
+            self._pooled_mocks.clear()
+            return
+        while self._pooled_mocks:
+            _mock_pool.release(self._pooled_mocks.pop())
+
+    def spy(
+        self,
+        obj: object,
+        name: str,
+        duplicate_iterators: bool | str = False,
+        *,
+        max_buffered: int | None = None,
+        sample_every: int | None = None,
+        record: str | None = None,
+        max_records: int | None = None,
+        weak_records: bool = False,
+        fast: bool = False,
+        sink: str | os.PathLike[str] | CallLog | None = None,
+        concurrent: bool = False,
+    ) -> SpyType:
         """
         Create a spy of method. It will run method normally, but it is now
         possible to use `mock` call features with it, like call count.
 
         :param obj: An object.
         :param name: A method in object.
-        :param duplicate_iterators: Whether to keep a copy of the returned iterator in `spy_return_iter`.
+        :param duplicate_iterators:
+            Whether to keep a copy of the returned iterator in `spy_return_iter`:
+            ``True`` or ``"full"`` to keep every item, ``"ring"`` to keep at most
+            ``max_buffered`` items, ``"sample"`` to keep every ``sample_every``
+            item, or ``"summary"`` to only count the items and hash them.
+        :param max_buffered:
+            Buffer at most this many items which were not read from
+            `spy_return_iter` yet, dropping the oldest ones.
+        :param sample_every:
+            With ``duplicate_iterators="sample"``, the interval between the
+            items kept in `spy_return_iter`.
+        :param record:
+            Which return values to keep in `spy_return_list`: ``"all"``, only
+            the ``"last"`` one, or ``"none"``. Defaults to ``"none"`` when
+            ``sink`` is given, and to ``"all"`` otherwise.
+        :param max_records:
+            Keep only the latest ``max_records`` return values in `spy_return_list`.
+        :param weak_records:
+            Keep weak references to the return values in `spy_return_list`.
+        :param fast:
+            Record calls with a lightweight wrapper instead of a mock object,
+            which is much cheaper when the spied method is called many times.
+        :param sink:
+            Path of a :class:`CallLog` file (or a ``CallLog`` object) where the
+            calls are written instead of being kept in memory; the log is
+            available in `spy_call_log`, and closed when the spy is stopped.
+        :param concurrent:
+            Record the calls made from several threads consistently: each
+            thread records to its own buffer, and the last call of the current
+            thread is available in `spy_local`.
         :return: Spy object.
+
+        Spies of ``async def`` functions also track the peak number of calls
+        awaited at the same time in `spy_max_concurrency`, the time each call
+        took in `spy_latencies` (kept like the return values, according to
+        ``record`` and ``max_records``), and the number of calls made by each
+        asyncio task, by name, in `spy_task_calls`.
+        """
+        open_log: Callable[[], CallLog] | None
+        if sink is None:
+            open_log = None
+        elif isinstance(sink, CallLog):
+            open_log = functools.partial(_no_ref, sink)
+        else:
+            open_log = functools.partial(CallLog, sink)
+        return self._spy(
+            obj,
+            name,
+            duplicate_iterators,
+            max_buffered=max_buffered,
+            sample_every=sample_every,
+            record=record,
+            max_records=max_records,
+            weak_records=weak_records,
+            fast=fast,
+            open_log=open_log,
+            concurrent=concurrent,
+        )
+
+    def _spy(
+        self,
+        obj: object,
+        name: str,
+        duplicate_iterators: bool | str,
+        *,
+        max_buffered: int | None,
+        sample_every: int | None,
+        record: str | None,
+        max_records: int | None,
+        weak_records: bool,
+        fast: bool,
+        open_log: Callable[[], CallLog] | None,
+        concurrent: bool,
+    ) -> SpyType:
+        """
+        Implementation of ``spy``, with the call log (if any) given as a
+        function which opens it, so it is only opened once the spy is installed.
         """
+        if record is None:
+            record = "all" if open_log is None else "none"
+        if record not in _SPY_RECORD_MODES:
+            raise ValueError(
+                f"record must be one of {', '.join(map(repr, _SPY_RECORD_MODES))}, "
+                f"got {record!r}"
+            )
+        if max_records is not None:
+            if record != "all":
+                raise ValueError('max_records can only be used with record="all"')
+            if max_records < 1:
+                raise ValueError(f"max_records must be positive, got {max_records}")
+        if open_log is not None and fast:
+            raise ValueError("sink cannot be used with fast=True")
+        strategy = "full" if duplicate_iterators is True else duplicate_iterators
+        if strategy is not False and strategy not in _ITERATOR_STRATEGIES:
+            raise ValueError(
+                "duplicate_iterators must be a bool or one of "
+                f"{', '.join(map(repr, _ITERATOR_STRATEGIES))}, got {strategy!r}"
+            )
+        if strategy == "ring" and max_buffered is None:
+            raise ValueError('duplicate_iterators="ring" requires max_buffered')
+        if strategy == "sample" and sample_every is None:
+            raise ValueError('duplicate_iterators="sample" requires sample_every')
+        if max_buffered is not None:
+            if strategy in (False, "summary"):
+                raise ValueError(
+                    "max_buffered can only be used with duplicate_iterators "
+                    'True, "full", "ring" or "sample"'
+                )
+            if max_buffered < 1:
+                raise ValueError(f"max_buffered must be positive, got {max_buffered}")
+        if sample_every is not None:
+            if strategy != "sample":
+                raise ValueError(
+                    'sample_every can only be used with duplicate_iterators="sample"'
+                )
+            if sample_every < 1:
+                raise ValueError(f"sample_every must be positive, got {sample_every}")
+        record_returns = record != "none"
+        ref = _weak_or_strong_ref if weak_records else _no_ref
+        # Created once the spy is installed, not to leak the file on errors.
+        log: CallLog | None = None
+        spy_local: _SpyLocal | None = None
+        if concurrent:
+            spy_local = _SpyLocal()
+            publish_lock = threading.Lock()
+
         method = getattr(obj, name)
+        # In fast mode the wrappers record the calls themselves.
+        make_call = type(self.mock_module.call)
 
         def wrapper(*args, **kwargs):
-            spy_obj.spy_return = None
-            spy_obj.spy_exception = None
+            if fast:
+                spy_obj.call_args_list.append(make_call((args, kwargs), two=True))
+            # Concurrent spies record the call for the current thread first.
+            state = spy_obj if spy_local is None else spy_local
+            state.spy_return = None
+            state.spy_exception = None
+            if log is not None:
+                timestamp = time.time()
             try:
                 r = method(*args, **kwargs)
             except BaseException as e:
-                spy_obj.spy_exception = e
+                state.spy_exception = e
+                if log is not None:
+                    log.write(args, kwargs, None, e, timestamp)
                 raise
             else:
-                if duplicate_iterators and isinstance(r, Iterator):
-                    r, duplicated_iterator = itertools.tee(r, 2)
-                    spy_obj.spy_return_iter = duplicated_iterator
+                if strategy:
+                    r, state.spy_return_iter = _duplicate_iterator(
+                        r, strategy, max_buffered, sample_every
+                    )
                 else:
-                    spy_obj.spy_return_iter = None
-
-                spy_obj.spy_return = r
-                spy_obj.spy_return_list.append(r)
+                    state.spy_return_iter = None
+
+                state.spy_return = r
+                if record_returns:
+                    spy_obj.spy_return_list.append(ref(r))
+                if log is not None:
+                    log.write(args, kwargs, r, None, timestamp)
+            finally:
+                if spy_local is not None:
+                    _publish_spy_local(spy_obj, spy_local, publish_lock)
             return r
 
+        in_flight = 0
+
         async def async_wrapper(*args, **kwargs):
-            spy_obj.spy_return = None
-            spy_obj.spy_exception = None
+            nonlocal in_flight
+            if fast:
+                recorded_call = make_call((args, kwargs), two=True)
+                spy_obj.call_args_list.append(recorded_call)
+                spy_obj.await_args_list.append(recorded_call)
+            state = spy_obj if spy_local is None else spy_local
+            state.spy_return = None
+            state.spy_exception = None
+            if log is not None:
+                timestamp = time.time()
+            spy_obj.spy_task_calls[_current_task_name()] += 1
+            in_flight += 1
+            # Setting attributes of mocks is slow, so only do it on a new peak.
+            if in_flight > spy_obj.spy_max_concurrency:  # noqa: PLR1730
+                spy_obj.spy_max_concurrency = in_flight
+            start = time.perf_counter()
             try:
                 r = await method(*args, **kwargs)
             except BaseException as e:
-                spy_obj.spy_exception = e
+                state.spy_exception = e
+                if log is not None:
+                    log.write(args, kwargs, None, e, timestamp)
                 raise
             else:
-                spy_obj.spy_return = r
-                spy_obj.spy_return_list.append(r)
+                if strategy:
+                    r, state.spy_return_iter = _duplicate_iterator(
+                        r, strategy, max_buffered, sample_every
+                    )
+                state.spy_return = r
+                if record_returns:
+                    spy_obj.spy_return_list.append(ref(r))
+                if log is not None:
+                    log.write(args, kwargs, r, None, timestamp)
+            finally:
+                if record_returns:
+                    spy_obj.spy_latencies.append(time.perf_counter() - start)
+                in_flight -= 1
+                if spy_local is not None:
+                    _publish_spy_local(spy_obj, spy_local, publish_lock)
             return r
 
-        if inspect.iscoroutinefunction(method):
+        is_async = inspect.iscoroutinefunction(method)
+        if is_async:
             wrapped = functools.update_wrapper(async_wrapper, method)
         else:
             wrapped = functools.update_wrapper(wrapper, method)
 
+        spy_obj: SpyType
+        if fast:
+            spy_obj = cast(
+                "SpyType",
+                _FastSpy(
+                    self.mock_module,
+                    method,
+                    name,
+                    _new_spy_return_list(record, max_records, concurrent),
+                ),
+            )
+            spy_obj.spy_local = spy_local
+            if is_async:
+                _init_async_spy_metrics(spy_obj, record, max_records)
+            with _profile("spy", lambda: _describe_target(obj, name)):
+                self._install_fast_spy(obj, name, wrapped, spy_obj)
+            return spy_obj
+
         autospec = inspect.ismethod(method) or inspect.isfunction(method)
 
-        spy_obj = cast(
-            SpyType,
-            self.patch.object(obj, name, side_effect=wrapped, autospec=autospec),
-        )
+        with _profile("spy", lambda: _describe_target(obj, name)):
+            spy_obj = cast(
+                "SpyType",
+                self.patch.object(obj, name, side_effect=wrapped, autospec=autospec),
+            )
+        if open_log is not None:
+            try:
+                log = open_log()
+            except BaseException:
+                self.stop(spy_obj)
+                raise
         spy_obj.spy_return = None
         spy_obj.spy_return_iter = None
-        spy_obj.spy_return_list = []
+        spy_obj.spy_return_list = _new_spy_return_list(record, max_records, concurrent)
         spy_obj.spy_exception = None
+        spy_obj.spy_call_log = log
+        spy_obj.spy_local = spy_local
+        spy_obj.spy_max_concurrency = None
+        spy_obj.spy_latencies = None
+        spy_obj.spy_task_calls = None
+        if is_async:
+            _init_async_spy_metrics(spy_obj, record, max_records)
+        if log is not None:
+            # Stopping the spy also stops the log.
+            mock_item = self._mock_cache._find(spy_obj)
+            assert mock_item.patch is not None
+            log._on_stop.append(mock_item.patch.stop)
+            mock_item.patch = log
+            _discard_calls(spy_obj, log)
         return spy_obj
 
+    def record_calls(
+        self, mock: Any, path: str | os.PathLike[str], format: str | None = None
+    ) -> CallLog:
+        """
+        Write the calls made to the given mock to a :class:`CallLog` file
+        instead of keeping them in memory (only the counters and the last call
+        are kept), until the returned log is given to ``mocker.stop`` or the
+        test finishes.
+
+        :param mock: The mock object, which is not required to come from this fixture.
+        :param path: Path of the file, to which calls are appended.
+        :param format: ``"jsonl"`` or ``"pickle"``, detected from the path by default.
+        :return: The call log, which can be iterated to replay the calls.
+        """
+        log = CallLog(path, format)
+        root = cast(Any, mock).mock if isinstance(mock, types.FunctionType) else mock
+        mock_call = root._mock_call
+
+        async def logged_await(awaitable: Any, args: Any, kwargs: Any) -> Any:
+            timestamp = time.time()
+            try:
+                r = await awaitable
+            except BaseException as e:
+                log.write(args, kwargs, None, e, timestamp)
+                raise
+            log.write(args, kwargs, r, None, timestamp)
+            return r
+
+        def logged_call(*args: Any, **kwargs: Any) -> Any:
+            timestamp = time.time()
+            try:
+                r = mock_call(*args, **kwargs)
+            except BaseException as e:
+                log.write(args, kwargs, None, e, timestamp)
+                raise
+            if inspect.iscoroutine(r):
+                # AsyncMock: the result is only known once awaited.
+                return logged_await(r, args, kwargs)
+            log.write(args, kwargs, r, None, timestamp)
+            return r
+
+        vars(root)["_mock_call"] = logged_call
+        log._on_stop.append(lambda: vars(root).pop("_mock_call", None))
+        _discard_calls(mock, log)
+        self._mock_cache.add(mock=cast(Any, log), patch=log)
+        return log
+
+    def record(
+        self,
+        obj: object,
+        name: str,
+        cassette: str | os.PathLike[str],
+        *,
+        mode: str = "once",
+        strict: bool = False,
+    ) -> MockType:
+        """
+        Record the results of a method to a cassette file, or replay them from
+        it without calling the method.
+
+        :param obj: An object.
+        :param name: A method in object.
+        :param cassette: Path of the cassette file.
+        :param mode:
+            ``"record"`` to call the method and (over)write the cassette with
+            its results, ``"replay"`` to serve them from the cassette, or
+            ``"once"`` to replay the cassette if it exists and record it
+            otherwise.
+        :param strict:
+            When replaying, fail the test on calls which are not in the
+            cassette, instead of calling the method and adding their results
+            to the cassette.
+        :return:
+            A spy of the method when recording, or a mock which replays the
+            results when replaying.
+        """
+        if mode not in _CASSETTE_MODES:
+            raise ValueError(
+                f"mode must be one of {', '.join(map(repr, _CASSETTE_MODES))}, "
+                f"got {mode!r}"
+            )
+        path = os.fspath(cassette)
+        if mode == "once":
+            mode = "replay" if os.path.exists(path) else "record"
+        drop_instance = isinstance(obj, type) and inspect.isfunction(
+            inspect.getattr_static(obj, name, None)
+        )
+        if mode == "record":
+
+            def open_cassette() -> CallLog:
+                with open(path, "wb"):
+                    pass
+                return _Cassette(path, drop_instance)
+
+            return cast(
+                "MockType",
+                self._spy(
+                    obj,
+                    name,
+                    False,
+                    max_buffered=None,
+                    sample_every=None,
+                    record=None,
+                    max_records=None,
+                    weak_records=False,
+                    fast=False,
+                    open_log=open_cassette,
+                    concurrent=False,
+                ),
+            )
+
+        method = getattr(obj, name)
+        try:
+            signature: inspect.Signature | None = inspect.signature(method)
+        except (TypeError, ValueError):
+            signature = None
+        if signature is not None and drop_instance:
+            signature = signature.replace(
+                parameters=list(signature.parameters.values())[1:]
+            )
+        # The results of each call, replayed in the order they were recorded,
+        # repeating the last one if the call is made more times.
+        results: dict[Any, list[tuple[Any, BaseException | None]]] = {}
+        for recorded in read_call_log(path, "pickle"):
+            key = _arguments_key(signature, recorded.args, recorded.kwargs)
+            if key is not None:
+                results.setdefault(key, []).append(
+                    (recorded.return_value, recorded.exception)
+                )
+        replayed: Counter[Any] = Counter()
+        # Opened once the mock is installed.
+        log: _Cassette | None = None
+
+        def lookup(args: Any, kwargs: Any) -> tuple[Any, BaseException | None] | None:
+            if drop_instance:
+                args = args[1:]
+            key = _arguments_key(signature, args, kwargs)
+            found = results.get(key) if key is not None else None
+            if not found:
+                if strict:
+                    call = self.mock_module.call(*args, **kwargs)
+                    pytest.fail(f"{call} not found in cassette {path}", pytrace=False)
+                return None
+            i = replayed[key]
+            replayed[key] += 1
+            return found[min(i, len(found) - 1)]
+
+        def miss(args: Any, kwargs: Any, r: Any, e: BaseException | None) -> None:
+            assert log is not None
+            log.write(args, kwargs, r, e, time.time())
+            if drop_instance:
+                args = args[1:]
+            key = _arguments_key(signature, args, kwargs)
+            if key is not None:
+                results.setdefault(key, []).append((r, e))
+                replayed[key] += 1
+
+        def replay(*args, **kwargs):
+            result = lookup(args, kwargs)
+            if result is None:
+                try:
+                    r = method(*args, **kwargs)
+                except BaseException as e:
+                    miss(args, kwargs, None, e)
+                    raise
+                miss(args, kwargs, r, None)
+                return r
+            return_value, exception = result
+            if exception is not None:
+                raise exception
+            return return_value
+
+        async def async_replay(*args, **kwargs):
+            result = lookup(args, kwargs)
+            if result is None:
+                try:
+                    r = await method(*args, **kwargs)
+                except BaseException as e:
+                    miss(args, kwargs, None, e)
+                    raise
+                miss(args, kwargs, r, None)
+                return r
+            return_value, exception = result
+            if exception is not None:
+                raise exception
+            return return_value
+
+        if inspect.iscoroutinefunction(method):
+            side_effect = functools.update_wrapper(async_replay, method)
+        else:
+            side_effect = functools.update_wrapper(replay, method)
+        autospec = inspect.ismethod(method) or inspect.isfunction(method)
+        mocked = self.patch.object(
+            obj, name, side_effect=side_effect, autospec=autospec
+        )
+        if not strict:
+            try:
+                log = _Cassette(path, drop_instance)
+            except BaseException:
+                self.stop(mocked)
+                raise
+            # Stopping the mock also closes the cassette.
+            mock_item = self._mock_cache._find(mocked)
+            assert mock_item.patch is not None
+            log._on_stop.append(mock_item.patch.stop)
+            mock_item.patch = log
+        return mocked
+
+    def memoize(
+        self,
+        target: str,
+        maxsize: int | None = 128,
+        policy: str = "lru",
+        *,
+        ttl: float | None = None,
+    ) -> Memoized:
+        """
+        Patch a function with a wrapper which caches its results by its
+        arguments, for expensive functions which always return the same
+        results for the same arguments.
+
+        :param target: The function to patch, as a dotted name like for ``patch``.
+        :param maxsize: The maximum number of cached results, or ``None`` for no limit.
+        :param policy:
+            Which result is evicted when the cache is full: the least recently
+            used (``"lru"``), the least frequently used (``"lfu"``), or the
+            oldest (``"ttl"``, which also expires results after ``ttl`` seconds).
+        :param ttl: With ``policy="ttl"``, seconds after which results expire.
+        :return:
+            The wrapper, with ``cache_info()`` and ``cache_clear()`` methods
+            like ``functools.lru_cache``.
+        """
+        if policy not in _MEMOIZE_POLICIES:
+            raise ValueError(
+                f"policy must be one of {', '.join(map(repr, _MEMOIZE_POLICIES))}, "
+                f"got {policy!r}"
+            )
+        if maxsize is not None and maxsize < 1:
+            raise ValueError(f"maxsize must be positive, got {maxsize}")
+        if policy == "ttl":
+            if ttl is None:
+                raise ValueError('policy="ttl" requires ttl')
+            if ttl <= 0:
+                raise ValueError(f"ttl must be positive, got {ttl}")
+        elif ttl is not None:
+            raise ValueError('ttl can only be used with policy="ttl"')
+        try:
+            owner_name, attribute = target.rsplit(".", 1)
+        except (TypeError, ValueError, AttributeError):
+            raise TypeError(
+                f"Need a valid target to patch. You supplied: {target!r}"
+            ) from None
+        owner = _target_cache.resolve(owner_name)
+        # Functions defined in classes must be bound when looked up in instances.
+        bind = isinstance(owner, type) and isinstance(
+            inspect.getattr_static(owner, attribute), types.FunctionType
+        )
+        memoized = Memoized(getattr(owner, attribute), maxsize, policy, ttl, bind)
+        return cast(Memoized, self.patch.object(owner, attribute, memoized))
+
+    def _install_fast_spy(
+        self, obj: object, name: str, wrapped: Callable[..., Any], spy_obj: SpyType
+    ) -> None:
+        installed: Any = wrapped
+        # ``method`` is already bound for class and static methods, so we must
+        # not let the wrapper be bound again when it is accessed.
+        if isinstance(obj, type) and isinstance(
+            inspect.getattr_static(obj, name), (classmethod, staticmethod)
+        ):
+            installed = staticmethod(wrapped)
+        p = self.mock_module.patch.object(obj, name, installed)
+        p.start()
+        self._mock_cache.add(mock=spy_obj, patch=p)
+
     def stub(self, name: str | None = None) -> unittest.mock.MagicMock:
         """
         Create a stub method. It accepts any arguments. Ideal to register to
@@ -236,7 +2780,7 @@ class MockerFixture:
         :return: Stub object.
         """
         return cast(
-            unittest.mock.MagicMock,
+            "unittest.mock.MagicMock",
             self.mock_module.MagicMock(spec=lambda *args, **kwargs: None, name=name),
         )
 
@@ -249,7 +2793,7 @@ class MockerFixture:
         :return: Stub object.
         """
         return cast(
-            AsyncMockType,
+            "AsyncMockType",
             self.mock_module.AsyncMock(spec=lambda *args, **kwargs: None, name=name),
         )
 
@@ -264,6 +2808,8 @@ class MockerFixture:
         def __init__(self, mock_cache, mock_module):
             self.__mock_cache = mock_cache
             self.mock_module = mock_module
+            # Scope of the mocker fixture, set by ``_mocker``.
+            self._scope = None
 
         def _start_patch(
             self, mock_func: Any, warn_on_mock_enter: bool, *args: Any, **kwargs: Any
@@ -272,13 +2818,133 @@ class MockerFixture:
             module, registering the patch to stop it later and returns the
             mock object resulting from the mock call.
             """
-            p = mock_func(*args, **kwargs)
-            mocked: MockType = p.start()
+            p, mocked = self._start_unregistered_patch(mock_func, *args, **kwargs)
             self.__mock_cache.add(mock=mocked, patch=p)
+            if warn_on_mock_enter:
+                self._warn_on_mock_enter(mocked)
+            return mocked
+
+        def _start_unregistered_patch(
+            self, mock_func: Any, *args: Any, **kwargs: Any
+        ) -> tuple[Any, MockType]:
+            """Like ``_start_patch``, without registering the patch, returning
+            it and the mock object."""
+            mocked: MockType
+            with _profile("patch", lambda: _describe_target(*args[:2])):
+                # Only patches of broader mockers, and the ones over them, are
+                # layered: plain function-scoped patches cost nothing extra.
+                if (
+                    _patch_layers or self._scope in _LAYERED_SCOPES
+                ) and mock_func is self.mock_module.patch.object:
+                    p, mocked = self._start_layered_patch(*args, **kwargs)
+                else:
+                    p = mock_func(*args, **kwargs)
+                    mocked = p.start()
+            return p, mocked
+
+        def _start_layered_patch(
+            self,
+            owner: Any,
+            attribute: str,
+            *,
+            new: Any,
+            spec: Any,
+            create: bool,
+            spec_set: Any,
+            autospec: Any,
+            new_callable: Any,
+            **kwargs: Any,
+        ) -> tuple[Any, Any]:
+            """Start a patch of ``mock.patch.object``, as an overlay if another
+            mocker patched the attribute already, returning the patch and the
+            object it installed."""
+            layers = _patch_layers.get((id(owner), attribute))
+            below = layers[-1] if layers else None
+            if below is None or below.mock_cache is self.__mock_cache:
+                p = self.mock_module.patch.object(
+                    owner,
+                    attribute,
+                    new,
+                    spec=spec,
+                    create=create,
+                    spec_set=spec_set,
+                    autospec=autospec,
+                    new_callable=new_callable,
+                    **kwargs,
+                )
+                if below is None and self._scope not in _LAYERED_SCOPES:
+                    return p, p.start()
+                layer = _LayeredPatch(
+                    owner,
+                    attribute,
+                    self.__mock_cache,
+                    self._scope,
+                    None,
+                    is_overlay=below is not None and below.is_overlay,
+                )
+                layer.start(p)
+                layer.original = (
+                    below.original if below else getattr(p, "temp_original", None)
+                )
+                layer.register()
+                return layer, layer.installed
+
+            # Patched by another mocker: only the new object is needed when
+            # it is given or a plain mock, which we create like mock does.
+            try:
+                current = vars(owner).get(attribute, _ABSENT)
+            except TypeError:
+                current = _ABSENT
+            if _redundant_patches is not None:
+                _redundant_patches.add(below, self._scope, new is current)
+            layer = _LayeredPatch(
+                owner,
+                attribute,
+                self.__mock_cache,
+                self._scope,
+                below.original,
+                is_overlay=True,
+            )
+            DEFAULT = self.mock_module.DEFAULT
+            if (
+                spec is not None
+                or create
+                or spec_set is not None
+                or autospec is not None
+                or new_callable is not None
+                or (kwargs and new is not DEFAULT)
+                or current is _ABSENT
+            ):
+                layer.start(
+                    self.mock_module.patch.object(
+                        owner,
+                        attribute,
+                        new,
+                        spec=spec,
+                        create=create,
+                        spec_set=spec_set,
+                        autospec=autospec,
+                        new_callable=new_callable,
+                        **kwargs,
+                    )
+                )
+            else:
+                if new is DEFAULT:
+                    original = getattr(below.original, "__func__", below.original)
+                    if inspect.iscoroutinefunction(original):
+                        new = self.mock_module.AsyncMock(name=attribute, **kwargs)
+                    else:
+                        new = self.mock_module.MagicMock(name=attribute, **kwargs)
+                layer.overlay(new)
+            layer.register()
+            return layer, layer.installed
+
+        @staticmethod
+        def _warn_on_mock_enter(mocked: Any) -> None:
             if hasattr(mocked, "reset_mock"):  # noqa:SIM102
                 # check if `mocked` is actually a mock object, as depending on autospec or target
                 # parameters `mocked` can be anything
-                if hasattr(mocked, "__enter__") and warn_on_mock_enter:
+                if hasattr(mocked, "__enter__"):
                     mocked.__enter__.side_effect = lambda: warnings.warn(
                         "Mocks returned by pytest-mock do not need to be used as context managers. "
                         "The mocker fixture automatically undoes mocking at the end of a test. "
@@ -287,7 +2953,6 @@ class MockerFixture:
                         PytestMockWarning,
                         stacklevel=5,
                     )
-            return mocked
 
         def object(
             self,
@@ -371,16 +3036,83 @@ class MockerFixture:
                 **kwargs,
             )
 
+        def many(
+            self,
+            targets: Mapping[str, builtins.object],
+            spec: builtins.object | None = None,
+            create: bool = False,
+            spec_set: builtins.object | None = None,
+            autospec: builtins.object | None = None,
+            new_callable: builtins.object | None = None,
+        ) -> dict[str, MockType]:
+            """
+            Patch several targets at once, given as a mapping of target
+            to ``new`` object (use ``DEFAULT`` to create a mock).
+
+            Modules are imported only once for all their targets, and the
+            patches are started as a group: if any of them fails, the ones
+            already started are undone. Returns a dict of target to the mock
+            object, which can also be given to ``mocker.stop`` to stop all
+            the patches at once.
+            """
+            owners: builtins.dict[str, builtins.object] = {}
+            for target in targets:
+                try:
+                    owner_name, _ = target.rsplit(".", 1)
+                except (TypeError, ValueError, AttributeError):
+                    raise TypeError(
+                        f"Need a valid target to patch. You supplied: {target!r}"
+                    ) from None
+                if owner_name not in owners:
+                    owners[owner_name] = _target_cache.resolve(owner_name)
+
+            # Each target is patched like by ``patch.object`` (with layering
+            # and profiling), undoing the ones already patched on errors.
+            group = _PatchGroup()
+            mocked: builtins.dict[str, MockType] = {}
+            try:
+                for target, new in targets.items():
+                    owner_name, attribute = target.rsplit(".", 1)
+                    if new is self.DEFAULT:
+                        new = self.mock_module.DEFAULT
+                    p, mocked[target] = self._start_unregistered_patch(
+                        self.mock_module.patch.object,
+                        owners[owner_name],
+                        attribute,
+                        new=new,
+                        spec=spec,
+                        create=create,
+                        spec_set=spec_set,
+                        autospec=autospec,
+                        new_callable=new_callable,
+                    )
+                    group.add(p)
+            except BaseException:
+                group.stop()
+                raise
+            self.__mock_cache.add(mock=mocked, patch=group)
+            for m in mocked.values():
+                self._warn_on_mock_enter(m)
+            return mocked
+
         def dict(
             self,
             in_dict: Mapping[Any, Any] | str,
             values: Mapping[Any, Any] | Iterable[tuple[Any, Any]] = (),
             clear: bool = False,
+            *,
+            incremental: bool = False,
             **kwargs: Any,
         ) -> Any:
-            """API to mock.patch.dict"""
+            """
+            API to mock.patch.dict
+
+            With ``incremental=True``, only the keys set by the patch are
+            restored when it is stopped, which is much faster for very large
+            dicts but does not undo other changes made to the dict meanwhile.
+            """
             return self._start_patch(
-                self.mock_module.patch.dict,
+                _IncrementalDictPatch if incremental else self.mock_module.patch.dict,
                 True,
                 in_dict,
                 values=values,
@@ -388,6 +3120,40 @@ class MockerFixture:
                 **kwargs,
             )
 
+        def env(
+            self,
+            values: Mapping[str, str | None] | None = None,
+            /,
+            clear: bool = False,
+            **variables: str | None,
+        ) -> Any:
+            """
+            Patch environment variables in ``os.environ``, given as a mapping
+            and/or keyword arguments; ``None`` removes a variable. ``clear``
+            removes all the other variables.
+
+            Only the variables set by the patch are restored when it is
+            stopped, like ``patch.dict(..., incremental=True)``.
+            """
+            if values is not None:
+                variables = {**values, **variables}
+            return self._start_patch(
+                _IncrementalDictPatch,
+                False,
+                os.environ,
+                values={k: v for k, v in variables.items() if v is not None},
+                clear=clear,
+                remove=[k for k, v in variables.items() if v is None],
+            )
+
+        @staticmethod
+        def cache_info() -> TargetCacheInfo:
+            """
+            Return the hits, misses and size of the session-wide cache used to
+            resolve the targets given as strings to ``mocker.patch``.
+            """
+            return _target_cache.info()
+
         @overload
         def __call__(
             self,
@@ -455,6 +3221,24 @@ class MockerFixture:
             """API to mock.patch"""
             if new is self.DEFAULT:
                 new = self.mock_module.DEFAULT
+            if isinstance(target, str) and "." in target:
+                owner_name, attribute = target.rsplit(".", 1)
+                with _profile("patch", lambda: target):
+                    owner = _target_cache.resolve(owner_name)
+                    return self._start_patch(
+                        self.mock_module.patch.object,
+                        True,
+                        owner,
+                        attribute,
+                        new=new,
+                        spec=spec,
+                        create=create,
+                        spec_set=spec_set,
+                        autospec=autospec,
+                        new_callable=new_callable,
+                        **kwargs,
+                    )
+            # Let mock.patch report invalid targets.
             return self._start_patch(
                 self.mock_module.patch,
                 True,
@@ -469,14 +3253,18 @@ class MockerFixture:
             )
 
 
-def _mocker(pytestconfig: Any) -> Generator[MockerFixture, None, None]:
+def _mocker(pytestconfig: Any, request: Any) -> Generator[MockerFixture, None, None]:
     """
     Return an object that has the same interface to the `mock` module, but
     takes care of automatically undoing all patches after each test method.
     """
+    _run_mock_setup()
     result = MockerFixture(pytestconfig)
+    result.patch._scope = request.scope
     yield result
-    result.stopall()
+    with _profile("stopall", lambda: "<teardown>"):
+        result.stopall()
+    result._release_pooled_mocks()
 
 
 mocker = pytest.fixture()(_mocker)  # default scope is function
@@ -486,159 +3274,313 @@ package_mocker = pytest.fixture(scope="package")(_mocker)
 session_mocker = pytest.fixture(scope="session")(_mocker)
 
 
-_mock_module_patches: list[Any] = []
-_mock_module_originals: dict[str, Any] = {}
+# Assert methods replaced by ``wrap_assert_methods``, as ``(class, name,
+# original)``, where ``original`` is ``None`` if the class inherited it.
+_wrapped_assert_methods: list[tuple[type[Any], str, Any]] = []
 
 
-def assert_wrapper(
-    __wrapped_mock_method__: Callable[..., Any], *args: Any, **kwargs: Any
-) -> None:
-    __tracebackhide__ = True
-    try:
-        __wrapped_mock_method__(*args, **kwargs)
-        return
-    except AssertionError as e:
-        if getattr(e, "_mock_introspection_applied", 0):
-            msg = str(e)
-        else:
-            __mock_self = args[0]
-            msg = str(e)
-            if __mock_self.call_args is not None:
-                actual_args, actual_kwargs = __mock_self.call_args
-                introspection = ""
-                try:
-                    assert actual_args == args[1:]
-                except AssertionError as e_args:
-                    introspection += "\nArgs:\n" + str(e_args)
-                try:
-                    assert actual_kwargs == kwargs
-                except AssertionError as e_kwargs:
-                    introspection += "\nKwargs:\n" + str(e_kwargs)
-                if introspection:
-                    msg += "\n\npytest introspection follows:\n" + introspection
-        e = AssertionError(msg)
-        e._mock_introspection_applied = True  # type:ignore[attr-defined]
-        raise e  # noqa:TRY201
-
-
-def assert_has_calls_wrapper(
-    __wrapped_mock_method__: Callable[..., Any], *args: Any, **kwargs: Any
-) -> None:
-    __tracebackhide__ = True
-    try:
-        __wrapped_mock_method__(*args, **kwargs)
-        return
-    except AssertionError as e:
-        any_order = kwargs.get("any_order", False)
-        if getattr(e, "_mock_introspection_applied", 0) or any_order:
-            msg = str(e)
-        else:
-            __mock_self = args[0]
-            msg = str(e)
-            if __mock_self.call_args_list is not None:
-                actual_calls = list(__mock_self.call_args_list)
-                expect_calls = args[1]
-                introspection = ""
-                from itertools import zip_longest
-
-                for actual_call, expect_call in zip_longest(actual_calls, expect_calls):
-                    if actual_call is not None:
-                        actual_args, actual_kwargs = actual_call
-                    else:
-                        actual_args = ()
-                        actual_kwargs = {}
+# Maximum number of differing calls shown at the start and at the end of the
+# introspection of ``assert_has_calls``, see the ``mock_introspection_limit``
+# ini option (0 means no limit).
+_introspection_limit = 5
 
-                    if expect_call is not None:
-                        _, expect_args, expect_kwargs = expect_call
-                    else:
-                        expect_args = ()
-                        expect_kwargs = {}
 
-                    try:
-                        assert actual_args == expect_args
-                    except AssertionError as e_args:
-                        introspection += "\nArgs:\n" + str(e_args)
-                    try:
-                        assert actual_kwargs == expect_kwargs
-                    except AssertionError as e_kwargs:
-                        introspection += "\nKwargs:\n" + str(e_kwargs)
-                if introspection:
-                    msg += "\n\npytest introspection follows:\n" + introspection
-        e = AssertionError(msg)
-        e._mock_introspection_applied = True  # type:ignore[attr-defined]
-        raise e  # noqa:TRY201
+class _AssertionMessage:
+    """
+    Message of the ``AssertionError`` raised by the wrapped assert methods:
+    adds pytest introspection of the differing arguments to the message of
+    the original error.
 
+    The introspection can be expensive to compute, so it is only computed when
+    the message is rendered (which never happens if the error is caught).
+    It is pickled as the rendered string.
+    """
 
-def wrap_assert_not_called(*args: Any, **kwargs: Any) -> None:
-    __tracebackhide__ = True
-    assert_wrapper(_mock_module_originals["assert_not_called"], *args, **kwargs)
+    __slots__ = ("_introspect", "msg")
 
+    def __init__(self, msg: str, introspect: Callable[[], str] | None = None) -> None:
+        self.msg = msg
+        self._introspect = introspect
 
-def wrap_assert_called_with(*args: Any, **kwargs: Any) -> None:
-    __tracebackhide__ = True
-    assert_wrapper(_mock_module_originals["assert_called_with"], *args, **kwargs)
+    def __str__(self) -> str:
+        introspect = self._introspect
+        if introspect is not None:
+            self._introspect = None
+            introspection = introspect()
+            if introspection:
+                self.msg += "\n\npytest introspection follows:\n" + introspection
+        return self.msg
 
+    def __repr__(self) -> str:
+        return repr(str(self))
 
-def wrap_assert_called_once(*args: Any, **kwargs: Any) -> None:
-    __tracebackhide__ = True
-    assert_wrapper(_mock_module_originals["assert_called_once"], *args, **kwargs)
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (str, (str(self),))
 
 
-def wrap_assert_called_once_with(*args: Any, **kwargs: Any) -> None:
-    __tracebackhide__ = True
-    assert_wrapper(_mock_module_originals["assert_called_once_with"], *args, **kwargs)
+def _assertion_message(e: AssertionError) -> _AssertionMessage | None:
+    """Return the lazy message of an error raised by a wrapped assert method."""
+    if len(e.args) == 1 and isinstance(e.args[0], _AssertionMessage):
+        return e.args[0]
+    return None
 
 
-def wrap_assert_has_calls(*args: Any, **kwargs: Any) -> None:
-    __tracebackhide__ = True
-    assert_has_calls_wrapper(
-        _mock_module_originals["assert_has_calls"], *args, **kwargs
-    )
+def _introspect_call(
+    actual_args: Any, actual_kwargs: Any, expect_args: Any, expect_kwargs: Any
+) -> str:
+    introspection = ""
+    try:
+        assert actual_args == expect_args
+    except AssertionError as e_args:
+        introspection += "\nArgs:\n" + str(e_args)
+    try:
+        assert actual_kwargs == expect_kwargs
+    except AssertionError as e_kwargs:
+        introspection += "\nKwargs:\n" + str(e_kwargs)
+    return introspection
+
+
+def _introspect_calls(actual_calls: list[Any], expect_calls: Any, limit: int) -> str:
+    differing = []
+    for actual_call, expect_call in itertools.zip_longest(actual_calls, expect_calls):
+        if actual_call is not None:
+            actual_args, actual_kwargs = actual_call
+        else:
+            actual_args = ()
+            actual_kwargs = {}
+
+        if expect_call is not None:
+            _, expect_args, expect_kwargs = expect_call
+        else:
+            expect_args = ()
+            expect_kwargs = {}
+
+        # Only compute the (expensive) assertion diffs of the calls we show.
+        if actual_args != expect_args or actual_kwargs != expect_kwargs:
+            differing.append((actual_args, actual_kwargs, expect_args, expect_kwargs))
+
+    omitted = 0
+    if limit and len(differing) > 2 * limit:
+        omitted = len(differing) - 2 * limit
+        differing = differing[:limit] + differing[-limit:]
+    introspection = ""
+    for i, pair in enumerate(differing):
+        if omitted and i == limit:
+            introspection += (
+                f"\n... {omitted} more differing calls omitted"
+                " (see the mock_introspection_limit ini option) ...\n"
+            )
+        introspection += _introspect_call(*pair)
+    return introspection
+
+
+def _call_assertion_error(
+    e: AssertionError, args: tuple[Any, ...], kwargs: dict[str, Any]
+) -> AssertionError:
+    """Return the error to raise when an assert method of ``args[0]`` failed."""
+    message = _assertion_message(e)
+    if message is not None:
+        return AssertionError(message)
+    introspect = None
+    __mock_self = args[0]
+    if __mock_self.call_args is not None:
+        actual_args, actual_kwargs = __mock_self.call_args
+        introspect = functools.partial(
+            _introspect_call, actual_args, actual_kwargs, args[1:], kwargs
+        )
+    return AssertionError(_AssertionMessage(str(e), introspect))
+
+
+def _has_calls_assertion_error(
+    e: AssertionError, args: tuple[Any, ...], kwargs: dict[str, Any]
+) -> AssertionError:
+    """Like ``_call_assertion_error``, for ``assert_has_calls``."""
+    message = _assertion_message(e)
+    if message is not None:
+        return AssertionError(message)
+    introspect = None
+    __mock_self = args[0]
+    if __mock_self.call_args_list is not None and not kwargs.get("any_order", False):
+        introspect = functools.partial(
+            _introspect_calls,
+            list(__mock_self.call_args_list),
+            list(args[1]),
+            _introspection_limit,
+        )
+    return AssertionError(_AssertionMessage(str(e), introspect))
+
+
+def _make_assert_wrapper(
+    original: Callable[..., Any],
+    error: Callable[
+        [AssertionError, tuple[Any, ...], dict[str, Any]], AssertionError
+    ] = _call_assertion_error,
+    indexed: Callable[[tuple[Any, ...], dict[str, Any]], bool] | None = None,
+) -> Callable[..., Any]:
+    """
+    Return a replacement for the assert method ``original`` which hides the
+    mock module from the traceback and adds introspection to its failures.
 
+    ``indexed`` checks the assertion using the call index first, when the
+    ``mock_call_index`` ini option is enabled.
+    """
+    # The original is bound in a closure and there is a single extra frame,
+    # as these are called in tight loops by some test suites.
+    if indexed is None:
 
-def wrap_assert_any_call(*args: Any, **kwargs: Any) -> None:
-    __tracebackhide__ = True
-    assert_wrapper(_mock_module_originals["assert_any_call"], *args, **kwargs)
+        def wrapper(*args: Any, **kwargs: Any) -> None:
+            __tracebackhide__ = True
+            try:
+                original(*args, **kwargs)
+            except AssertionError as e:
+                e = error(e, args, kwargs)
+                raise e  # noqa:TRY201
 
+    else:
 
-def wrap_assert_called(*args: Any, **kwargs: Any) -> None:
-    __tracebackhide__ = True
-    assert_wrapper(_mock_module_originals["assert_called"], *args, **kwargs)
+        def wrapper(*args: Any, **kwargs: Any) -> None:
+            __tracebackhide__ = True
+            if _call_index_mock_module is not None and indexed(args, kwargs):
+                return
+            try:
+                original(*args, **kwargs)
+            except AssertionError as e:
+                e = error(e, args, kwargs)
+                raise e  # noqa:TRY201
+
+    # Keep our __module__, which tells apart wrapped methods.
+    return functools.update_wrapper(
+        wrapper, original, assigned=("__name__", "__qualname__", "__doc__")
+    )
 
 
-def wrap_assert_not_awaited(*args: Any, **kwargs: Any) -> None:
-    __tracebackhide__ = True
-    assert_wrapper(_mock_module_originals["assert_not_awaited"], *args, **kwargs)
+# The mock module, when the ``mock_call_index`` ini option is enabled.
+_call_index_mock_module: Any = None
 
 
-def wrap_assert_awaited_with(*args: Any, **kwargs: Any) -> None:
-    __tracebackhide__ = True
-    assert_wrapper(_mock_module_originals["assert_awaited_with"], *args, **kwargs)
+def _freeze(obj: Any) -> Any:
+    """
+    Return a hashable version of ``obj``, comparing equal when ``obj`` does.
 
+    Lists and dicts are tagged with their type, so they do not compare equal
+    to the tuples and frozensets they are made of. Hashable tuples are frozen
+    to themselves.
+    """
+    if isinstance(obj, tuple):
+        return tuple(_freeze(x) for x in obj)
+    if isinstance(obj, list):
+        return (list, tuple(_freeze(x) for x in obj))
+    if isinstance(obj, dict):
+        return (dict, frozenset((_freeze(k), _freeze(v)) for k, v in obj.items()))
+    return obj
+
+
+def _call_key(normalized_call: Any) -> Any:
+    """Return the index key of a call returned by ``_call_matcher``, or ``None``."""
+    if isinstance(normalized_call, Exception):
+        return None
+    if len(normalized_call) == 2:
+        name = ""
+        args, kwargs = normalized_call
+    else:
+        name, args, kwargs = normalized_call
+    key = (name, _freeze(args), _freeze(kwargs))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
 
-def wrap_assert_awaited_once(*args: Any, **kwargs: Any) -> None:
-    __tracebackhide__ = True
-    assert_wrapper(_mock_module_originals["assert_awaited_once"], *args, **kwargs)
 
+@dataclass
+class _CallIndex:
+    """
+    Index of the calls recorded in a call list of a mock (``call_args_list``
+    or ``mock_calls``), by their arguments as normalized by ``_call_matcher``.
 
-def wrap_assert_awaited_once_with(*args: Any, **kwargs: Any) -> None:
-    __tracebackhide__ = True
-    assert_wrapper(_mock_module_originals["assert_awaited_once_with"], *args, **kwargs)
+    The index is only used to find candidate calls: they are always compared
+    again using the mock, so a stale index can only make an assertion fall
+    back to the mock module.
+    """
 
+    calls: list[Any]
+    indexed: int = 0
+    positions: dict[Any, list[int]] = field(default_factory=dict)
 
-def wrap_assert_has_awaits(*args: Any, **kwargs: Any) -> None:
-    __tracebackhide__ = True
-    assert_wrapper(_mock_module_originals["assert_has_awaits"], *args, **kwargs)
+    @classmethod
+    def of(cls, mock: Any, attribute: str) -> _CallIndex:
+        calls = getattr(mock, attribute)
+        indexes: dict[str, _CallIndex] = vars(mock).setdefault(
+            "_pytest_mock_call_index", {}
+        )
+        index = indexes.get(attribute)
+        # Call lists are replaced by reset_mock() and can be truncated by
+        # mocker.restore(), in which case we start over.
+        if index is None or index.calls is not calls or len(calls) < index.indexed:
+            index = indexes[attribute] = cls(calls)
+        for i in range(index.indexed, len(calls)):
+            key = _call_key(mock._call_matcher(calls[i]))
+            if key is not None:
+                index.positions.setdefault(key, []).append(i)
+        index.indexed = len(calls)
+        return index
+
+    def matches(self, mock: Any, position: int, expected: Any) -> bool:
+        actual = mock._call_matcher(self.calls[position])
+        # Stricter than the mock module, which compares in only one direction.
+        return bool(expected == actual and actual == expected)
+
+
+def _indexed_any_call(mock: Any, args: Any, kwargs: Any) -> bool:
+    """Return True if ``mock`` was called with the arguments, using the index."""
+    expected = mock._call_matcher(_call_index_mock_module.call(*args, **kwargs))
+    key = _call_key(expected)
+    if key is None:
+        return False
+    index = _CallIndex.of(mock, "call_args_list")
+    return any(index.matches(mock, i, expected) for i in index.positions.get(key, ()))
+
+
+def _indexed_has_calls(mock: Any, calls: Any, any_order: bool) -> bool:
+    """Return True if ``mock`` has the given calls, using the index."""
+    expected = [mock._call_matcher(c) for c in calls]
+    keys = [_call_key(c) for c in expected]
+    if not expected or None in keys:
+        return False
+    index = _CallIndex.of(mock, "mock_calls")
+
+    if any_order:
+        # Each expected call must match a different recorded call.
+        used: dict[Any, int] = {}
+        for kall, key in zip(expected, keys):
+            positions = index.positions.get(key, [])
+            i = used.get(key, 0)
+            while i < len(positions) and not index.matches(mock, positions[i], kall):
+                i += 1
+            if i == len(positions):
+                return False
+            used[key] = i + 1
+        return True
+
+    # Look for the sequence around the occurrences of its rarest call.
+    offset = min(range(len(keys)), key=lambda j: len(index.positions.get(keys[j], ())))
+    for position in index.positions.get(keys[offset], ()):
+        start = position - offset
+        if start < 0 or start + len(expected) > len(index.calls):
+            continue
+        if all(index.matches(mock, start + j, kall) for j, kall in enumerate(expected)):
+            return True
+    return False
 
 
-def wrap_assert_any_await(*args: Any, **kwargs: Any) -> None:
-    __tracebackhide__ = True
-    assert_wrapper(_mock_module_originals["assert_any_await"], *args, **kwargs)
+def _indexed_any_call_args(args: tuple[Any, ...], kwargs: dict[str, Any]) -> bool:
+    return _indexed_any_call(args[0], args[1:], kwargs)
 
 
-def wrap_assert_awaited(*args: Any, **kwargs: Any) -> None:
-    __tracebackhide__ = True
-    assert_wrapper(_mock_module_originals["assert_awaited"], *args, **kwargs)
+def _indexed_has_calls_args(args: tuple[Any, ...], kwargs: dict[str, Any]) -> bool:
+    return len(args) == 2 and _indexed_has_calls(
+        args[0], args[1], kwargs.get("any_order", False)
+    )
 
 
 def wrap_assert_methods(config: Any) -> None:
@@ -647,79 +3589,389 @@ def wrap_assert_methods(config: Any) -> None:
     add introspection information to specified argument asserts.
     """
     # Make sure we only do this once
-    if _mock_module_originals:
+    if _wrapped_assert_methods:
         return
 
     mock_module = get_mock_module(config)
 
-    wrappers = {
-        "assert_called": wrap_assert_called,
-        "assert_called_once": wrap_assert_called_once,
-        "assert_called_with": wrap_assert_called_with,
-        "assert_called_once_with": wrap_assert_called_once_with,
-        "assert_any_call": wrap_assert_any_call,
-        "assert_has_calls": wrap_assert_has_calls,
-        "assert_not_called": wrap_assert_not_called,
-    }
-    for method, wrapper in wrappers.items():
+    def wrap(cls: type[Any], method: str, *args: Any) -> None:
         try:
-            original = getattr(mock_module.NonCallableMock, method)
+            original = getattr(cls, method)
         except AttributeError:  # pragma: no cover
-            continue
-        _mock_module_originals[method] = original
-        patcher = mock_module.patch.object(mock_module.NonCallableMock, method, wrapper)
-        patcher.start()
-        _mock_module_patches.append(patcher)
+            return
+        _wrapped_assert_methods.append((cls, method, vars(cls).get(method)))
+        setattr(cls, method, _make_assert_wrapper(original, *args))
+
+    for method in (
+        "assert_called",
+        "assert_called_once",
+        "assert_called_with",
+        "assert_called_once_with",
+        "assert_not_called",
+    ):
+        wrap(mock_module.NonCallableMock, method)
+    wrap(
+        mock_module.NonCallableMock,
+        "assert_any_call",
+        _call_assertion_error,
+        _indexed_any_call_args,
+    )
+    wrap(
+        mock_module.NonCallableMock,
+        "assert_has_calls",
+        _has_calls_assertion_error,
+        _indexed_has_calls_args,
+    )
 
     if hasattr(mock_module, "AsyncMock"):
-        async_wrappers = {
-            "assert_awaited": wrap_assert_awaited,
-            "assert_awaited_once": wrap_assert_awaited_once,
-            "assert_awaited_with": wrap_assert_awaited_with,
-            "assert_awaited_once_with": wrap_assert_awaited_once_with,
-            "assert_any_await": wrap_assert_any_await,
-            "assert_has_awaits": wrap_assert_has_awaits,
-            "assert_not_awaited": wrap_assert_not_awaited,
-        }
-        for method, wrapper in async_wrappers.items():
-            try:
-                original = getattr(mock_module.AsyncMock, method)
-            except AttributeError:  # pragma: no cover
-                continue
-            _mock_module_originals[method] = original
-            patcher = mock_module.patch.object(mock_module.AsyncMock, method, wrapper)
-            patcher.start()
-            _mock_module_patches.append(patcher)
+        for method in (
+            "assert_awaited",
+            "assert_awaited_once",
+            "assert_awaited_with",
+            "assert_awaited_once_with",
+            "assert_any_await",
+            "assert_has_awaits",
+            "assert_not_awaited",
+        ):
+            wrap(mock_module.AsyncMock, method)
 
     config.add_cleanup(unwrap_assert_methods)
 
 
 def unwrap_assert_methods() -> None:
-    for patcher in _mock_module_patches:
+    for cls, method, original in reversed(_wrapped_assert_methods):
+        if original is None:
+            delattr(cls, method)
+        else:
+            setattr(cls, method, original)
+    _wrapped_assert_methods.clear()
+
+
+@dataclass
+class _SignatureCacheEntry:
+    fingerprint: tuple[Any, ...]
+    result: Any
+
+
+# Session-wide cache of signatures computed by the mock module, see
+# ``install_autospec_cache``.
+_autospec_cache: dict[Any, _SignatureCacheEntry] = {}
+_autospec_cache_patches: list[Any] = []
+
+# Only cache objects which are definitions (and not arbitrary instances), as the
+# cache keeps strong references to them for the whole session.
+_cacheable_spec_types = (types.FunctionType, type, classmethod, staticmethod)
+
+
+def _is_cacheable_spec(spec: Any) -> bool:
+    """
+    Return whether ``spec`` lives for the whole session anyway: lambdas (like
+    the ones made by ``mocker.stub()``) and the functions and classes defined
+    in functions are created again by each call, so caching them would only
+    keep them (and everything they capture) alive.
+    """
+    if not isinstance(spec, _cacheable_spec_types):
+        return False
+    qualname = getattr(getattr(spec, "__func__", spec), "__qualname__", "<")
+    return "<" not in qualname
+
+
+def _spec_fingerprint(spec: Any) -> tuple[Any, ...]:
+    """
+    Return the attributes of ``spec`` whose identity determines its signature,
+    so we can detect when the object has changed (for example a method being
+    replaced in a class ``__dict__``).
+    """
+    spec = getattr(spec, "__func__", spec)
+    return (
+        getattr(spec, "__code__", None),
+        getattr(spec, "__defaults__", None),
+        getattr(spec, "__kwdefaults__", None),
+        *getattr(spec, "__dict__", {}).values(),
+    )
+
+
+def _same_fingerprint(a: tuple[Any, ...], b: tuple[Any, ...]) -> bool:
+    return len(a) == len(b) and all(x is y for x, y in zip(a, b))
+
+
+def _make_cached_get_signature_object(
+    original: Callable[[Any, bool, bool], Any],
+) -> Callable[[Any, bool, bool], Any]:
+    def get_signature_object(func: Any, as_instance: bool, eat_self: bool) -> Any:
+        # The signature of a bound method only depends on the underlying
+        # function, so all bound methods of the same function share an entry.
+        bound = isinstance(func, types.MethodType)
+        spec = func.__func__ if bound else func
+        if not _is_cacheable_spec(spec):
+            return original(func, as_instance, eat_self)
+
+        key = (spec, bound, as_instance, eat_self)
+        fingerprint = _spec_fingerprint(spec)
+        entry = _autospec_cache.get(key)
+        if entry is None or not _same_fingerprint(entry.fingerprint, fingerprint):
+            entry = _SignatureCacheEntry(
+                fingerprint, original(func, as_instance, eat_self)
+            )
+            _autospec_cache[key] = entry
+        if bound and entry.result is not None:
+            return func, entry.result[1]
+        return entry.result
+
+    return get_signature_object
+
+
+def install_autospec_cache(config: Any) -> None:
+    """
+    Cache the signatures introspected by the mock module when creating
+    autospecced (and spec'd) mocks, so they are computed only once per
+    session for each spec object.
+    """
+    # Make sure we only do this once
+    if _autospec_cache_patches:
+        return
+
+    mock_module = get_mock_module(config)
+    # The standalone mock package defines its functions in a submodule.
+    defining_module = sys.modules[mock_module.create_autospec.__module__]
+    try:
+        original = defining_module._get_signature_object
+    except AttributeError:  # pragma: no cover
+        return
+    patcher = mock_module.patch.object(
+        defining_module,
+        "_get_signature_object",
+        _make_cached_get_signature_object(original),
+    )
+    patcher.start()
+    _autospec_cache_patches.append(patcher)
+
+    config.add_cleanup(uninstall_autospec_cache)
+
+
+def uninstall_autospec_cache() -> None:
+    for patcher in _autospec_cache_patches:
         patcher.stop()
-    _mock_module_patches[:] = []
-    _mock_module_originals.clear()
+    _autospec_cache_patches[:] = []
+    _autospec_cache.clear()
+
+
+def install_call_index(config: Any) -> None:
+    global _call_index_mock_module
+    _call_index_mock_module = get_mock_module(config)
+    config.add_cleanup(uninstall_call_index)
+
+
+def uninstall_call_index() -> None:
+    global _call_index_mock_module
+    _call_index_mock_module = None
+
+
+def install_mock_pool(config: Any, size: int) -> None:
+    global _mock_pool
+    _mock_pool = _MockPool(size)
+    config.add_cleanup(uninstall_mock_pool)
+
+
+def uninstall_mock_pool() -> None:
+    global _mock_pool
+    _mock_pool = None
+
+
+# Setup which needs the mock module, deferred by ``pytest_configure`` until a
+# test requests a mocker fixture or imports the mock module, so sessions which
+# do not use mocks do not pay for importing and patching it.
+_pending_mock_setup: list[Callable[[], None]] = []
+_pending_mock_module_name = "unittest.mock"
+
+
+class _MockImportHook:
+    """
+    Import finder which runs the pending setup as soon as the mock module is
+    imported, for tests which import it in their body.
+    """
+
+    def find_spec(self, fullname: str, path: Any, target: Any = None) -> Any:
+        if fullname != _pending_mock_module_name or not _pending_mock_setup:
+            return None
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        loader = spec.loader
+        if loader is None or not hasattr(loader, "exec_module"):
+            return spec
+        exec_module = loader.exec_module
+
+        def exec_and_setup(module: types.ModuleType) -> None:
+            exec_module(module)
+            # The setup looks the module up in its package, which the import
+            # system only does once this returns.
+            package, _, name = fullname.rpartition(".")
+            if package:
+                setattr(sys.modules[package], name, module)
+            _run_mock_setup()
+
+        # The loader is created for this spec only.
+        loader.exec_module = exec_and_setup  # type:ignore[method-assign]
+        return spec
+
+
+_mock_import_hook = _MockImportHook()
+
+
+def install_mock_setup(config: Any, setup: list[Callable[[], None]]) -> None:
+    global _pending_mock_module_name
+    _pending_mock_setup[:] = setup
+    if parse_ini_boolean(config.getini("mock_use_standalone_module")):
+        _pending_mock_module_name = "mock"
+    else:
+        _pending_mock_module_name = "unittest.mock"
+    if setup and _pending_mock_module_name not in sys.modules:
+        sys.meta_path.insert(0, _mock_import_hook)
+    config.add_cleanup(uninstall_mock_setup)
+
+
+def uninstall_mock_setup() -> None:
+    _pending_mock_setup.clear()
+    with contextlib.suppress(ValueError):
+        sys.meta_path.remove(_mock_import_hook)
+
+
+def _run_mock_setup() -> None:
+    while _pending_mock_setup:
+        _pending_mock_setup.pop(0)()
+
+
+def install_mock_profiler(config: Any, top: int, json_path: str | None) -> None:
+    global _mock_profiler
+    _mock_profiler = _MockProfiler(top, json_path)
+    config.pluginmanager.register(_mock_profiler, "pytest_mock_profiler")
+    config.add_cleanup(uninstall_mock_profiler)
+
+
+def uninstall_mock_profiler() -> None:
+    global _mock_profiler
+    _mock_profiler = None
+
+
+def install_redundant_patches(config: Any) -> None:
+    global _redundant_patches
+    _redundant_patches = _RedundantPatches()
+    config.pluginmanager.register(_redundant_patches, "pytest_mock_redundant_patches")
+    config.add_cleanup(uninstall_redundant_patches)
+
+
+def uninstall_redundant_patches() -> None:
+    global _redundant_patches
+    _redundant_patches = None
 
 
 def pytest_addoption(parser: Any) -> None:
+    group = parser.getgroup("pytest-mock")
+    group.addoption(
+        "--mock-profile",
+        action="store_true",
+        default=False,
+        help="Measure the time spent by pytest-mock patching, spying and "
+        "undoing mocks, reporting the slowest targets and tests",
+    )
+    group.addoption(
+        "--mock-profile-top",
+        type=int,
+        default=10,
+        metavar="N",
+        help="Number of targets and tests to show in the --mock-profile report "
+        "(default: %(default)s)",
+    )
+    group.addoption(
+        "--mock-profile-json",
+        default=None,
+        metavar="PATH",
+        help="Write the --mock-profile results to a JSON file (implies --mock-profile)",
+    )
+    group.addoption(
+        "--mock-redundant-patches",
+        action="store_true",
+        default=False,
+        help="Report the targets patched by a mocker fixture while a mocker "
+        "of a broader scope had patched them already",
+    )
     parser.addini(
         "mock_traceback_monkeypatch",
         "Monkeypatch the mock library to improve reporting of the "
         "assert_called_... methods",
         default=True,
     )
+    parser.addini(
+        "mock_introspection_limit",
+        "Number of differing calls shown at the start and at the end of the "
+        "assert_has_calls introspection (0 shows all of them)",
+        default="5",
+    )
+    parser.addini(
+        "mock_call_index",
+        "Index the calls recorded by mocks to speed up assert_any_call and "
+        "assert_has_calls on mocks called many times",
+        default=False,
+    )
     parser.addini(
         "mock_use_standalone_module",
         'Use standalone "mock" (from PyPI) instead of builtin "unittest.mock" '
         "on Python 3",
         default=False,
     )
+    parser.addini(
+        "mock_autospec_cache",
+        "Cache the signatures of autospecced objects for the whole session",
+        default=False,
+    )
+    parser.addini(
+        "mock_pool_size",
+        "Reuse MagicMock and AsyncMock objects created through mocker across "
+        "tests, keeping up to this many idle mocks for each set of arguments "
+        "(0 disables the pool)",
+        default="0",
+    )
 
 
 def pytest_configure(config: Any) -> None:
+    global _introspection_limit
+    setup: list[Callable[[], None]] = []
     tb = config.getoption("--tb", default="auto")
     if (
         parse_ini_boolean(config.getini("mock_traceback_monkeypatch"))
         and tb != "native"
     ):
-        wrap_assert_methods(config)
+        _introspection_limit = int(config.getini("mock_introspection_limit"))
+        setup.append(lambda: wrap_assert_methods(config))
+        if parse_ini_boolean(config.getini("mock_call_index")):
+            setup.append(lambda: install_call_index(config))
+    if parse_ini_boolean(config.getini("mock_autospec_cache")):
+        setup.append(lambda: install_autospec_cache(config))
+    install_mock_setup(config, setup)
+    pool_size = int(config.getini("mock_pool_size"))
+    if pool_size > 0:
+        install_mock_pool(config, pool_size)
+    json_path = config.getoption("--mock-profile-json", default=None)
+    if config.getoption("--mock-profile", default=False) or json_path:
+        install_mock_profiler(config, config.getoption("--mock-profile-top"), json_path)
+    if config.getoption("--mock-redundant-patches", default=False):
+        install_redundant_patches(config)
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_setup(item: Any) -> None:
+    # Tests may use the mock module directly, without a mocker fixture.
+    if _pending_mock_setup and _pending_mock_module_name in sys.modules:
+        _run_mock_setup()
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_call(item: Any) -> None:
+    if _pending_mock_setup and _pending_mock_module_name in sys.modules:
+        _run_mock_setup()
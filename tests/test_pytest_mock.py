@@ -1,12 +1,22 @@
+import asyncio
+import hashlib
+import json
 import os
+import pickle
 import platform
 import re
+import subprocess
 import sys
+import threading
 import warnings
+from collections.abc import AsyncGenerator
+from collections.abc import AsyncIterator
 from collections.abc import Callable
 from collections.abc import Generator
 from collections.abc import Iterable
 from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing
 from contextlib import contextmanager
 from typing import Any
 from unittest.mock import AsyncMock
@@ -17,6 +27,7 @@ import pytest
 from pytest_mock import MockerFixture
 from pytest_mock import PytestMockWarning
 from pytest_mock import SpyType
+from pytest_mock import read_call_log
 
 pytest_plugins = "pytester"
 
@@ -145,6 +156,104 @@ def test_mock_patches(
     mocker.stopall()
 
 
+def test_mock_patch_target_cache(mocker: MockerFixture) -> None:
+    mocker.patch("os.path.exists")
+    info = mocker.patch.cache_info()
+    mocker.patch("os.path.isdir")
+    mocker.patch("os.path.isfile")
+    assert mocker.patch.cache_info().hits == info.hits + 2
+    assert mocker.patch.cache_info().misses == info.misses
+
+
+def test_mock_patch_target_cache_reimport(
+    testdir: Any, mocker: MockerFixture, request: pytest.FixtureRequest
+) -> None:
+    testdir.makepyfile(
+        uut_target_cache="""
+        def func():
+            return 1
+        """
+    )
+    syspath_insert_workaround(request, testdir)
+
+    old_module = __import__("uut_target_cache")
+    mocker.patch("uut_target_cache.func", return_value=2)
+    assert old_module.func() == 2
+    mocker.stopall()
+
+    del sys.modules["uut_target_cache"]
+    new_module = __import__("uut_target_cache")
+    request.addfinalizer(lambda: sys.modules.pop("uut_target_cache", None))
+    misses = mocker.patch.cache_info().misses
+    mocker.patch("uut_target_cache.func", return_value=3)
+    assert mocker.patch.cache_info().misses == misses + 1
+    assert new_module.func() == 3
+    assert old_module.func() == 1
+
+
+def test_mock_patch_colon_target(mocker: MockerFixture) -> None:
+    """The "module:attribute" syntax of ``pkgutil.resolve_name`` is supported."""
+    exists = mocker.patch("os:path.exists", return_value=True)
+    assert os.path.exists("x") is True
+    assert os.path.exists is exists
+    mocked = mocker.patch.many({"os:path.isdir": mocker.DEFAULT})
+    assert os.path.isdir is mocked["os:path.isdir"]
+    mocker.patch.dict("os:environ", {"PYTEST_MOCK_VAR": "1"})
+    assert os.environ["PYTEST_MOCK_VAR"] == "1"
+    memoized = mocker.memoize("os:path.basename")
+    assert os.path.basename is memoized
+    mocker.stopall()
+    assert not isinstance(os.path.exists, mocker.MagicMock)
+    assert "PYTEST_MOCK_VAR" not in os.environ
+
+
+def test_mock_patch_invalid_target(mocker: MockerFixture) -> None:
+    with pytest.raises(TypeError, match="Need a valid target to patch"):
+        mocker.patch("os")
+    with pytest.raises(ModuleNotFoundError):
+        mocker.patch("does_not_exist.func")
+    with pytest.raises(AttributeError):
+        mocker.patch("os.does_not_exist")
+
+
+def test_mock_patch_many(mocker: MockerFixture) -> None:
+    original_remove = os.remove
+    original_listdir = os.listdir
+    original_isfile = os.path.isfile
+
+    mocked = mocker.patch.many(
+        {
+            "os.remove": mocker.DEFAULT,
+            "os.listdir": mocker.DEFAULT,
+            "os.path.isfile": mocker.sentinel.isfile,
+        }
+    )
+    assert list(mocked) == ["os.remove", "os.listdir", "os.path.isfile"]
+    assert os.remove is mocked["os.remove"]
+    assert isinstance(os.remove, MagicMock)
+    assert os.listdir is mocked["os.listdir"]
+    assert os.path.isfile is mocker.sentinel.isfile
+
+    mocker.stop(mocked)
+    assert os.remove is original_remove
+    assert os.listdir is original_listdir
+    assert os.path.isfile is original_isfile
+
+
+def test_mock_patch_many_is_atomic(mocker: MockerFixture) -> None:
+    original_remove = os.remove
+    with pytest.raises(AttributeError):
+        mocker.patch.many({"os.remove": mocker.DEFAULT, "os.does_not_exist": 1})
+    assert os.remove is original_remove
+    # Nothing was registered.
+    mocker.stopall()
+
+
+def test_mock_patch_many_invalid_target(mocker: MockerFixture) -> None:
+    with pytest.raises(TypeError, match="Need a valid target to patch"):
+        mocker.patch.many({"os": 1})
+
+
 def test_mock_patch_dict(mocker: MockerFixture) -> None:
     """
     Testing
@@ -169,6 +278,176 @@ def test_mock_patch_dict_resetall(mocker: MockerFixture) -> None:
     assert x == {"new": 10}
 
 
+def test_mock_patch_dict_incremental(mocker: MockerFixture) -> None:
+    x = {"a": 1, "b": 2}
+    assert mocker.patch.dict(x, {"a": 10}, incremental=True, c=3) is x
+    assert x == {"a": 10, "b": 2, "c": 3}
+    # Only the keys set by the patch are restored.
+    x["d"] = 4
+    del x["c"]
+    mocker.stop(x)
+    assert x == {"a": 1, "b": 2, "d": 4}
+
+    mocker.patch.dict(x, [("e", 5)], clear=True, incremental=True)
+    assert x == {"e": 5}
+    mocker.stopall()
+    assert x == {"a": 1, "b": 2, "d": 4}
+
+
+def test_mock_patch_dict_incremental_target(mocker: MockerFixture) -> None:
+    mocker.patch.dict("os.environ", {"PYTEST_MOCK_VAR": "1"}, incremental=True)
+    assert os.environ["PYTEST_MOCK_VAR"] == "1"
+    # A failed patch is undone right away.
+    environ = dict(os.environ)
+    with pytest.raises(TypeError):
+        mocker.patch.dict(
+            os.environ, {"PYTEST_MOCK_VAR": "2", "OTHER": 1}, incremental=True
+        )
+    assert os.environ == environ
+    mocker.stopall()
+    assert "PYTEST_MOCK_VAR" not in os.environ
+
+
+def test_mock_patch_env(mocker: MockerFixture) -> None:
+    environ = dict(os.environ)
+    os.environ["PYTEST_MOCK_UNSET"] = "1"
+    try:
+        mocker.patch.env({"clear": "yes"}, PYTEST_MOCK_VAR="1", PYTEST_MOCK_UNSET=None)
+        assert os.environ["PYTEST_MOCK_VAR"] == "1"
+        assert os.environ["clear"] == "yes"
+        assert "PYTEST_MOCK_UNSET" not in os.environ
+        assert os.getenv("PYTEST_MOCK_VAR") == "1"
+
+        mocker.patch.env(PYTEST_MOCK_VAR="2", clear=True)
+        assert dict(os.environ) == {"PYTEST_MOCK_VAR": "2"}
+        mocker.stopall()
+    finally:
+        del os.environ["PYTEST_MOCK_UNSET"]
+    assert os.environ == environ
+
+
+def test_mock_patch_env_module_mocker(testdir: Any) -> None:
+    testdir.makepyfile(
+        """
+        import os
+
+        import pytest
+
+        @pytest.fixture(scope="module", autouse=True)
+        def env(module_mocker):
+            module_mocker.patch.env(PYTEST_MOCK_VAR="1")
+
+        def test_a():
+            assert os.environ["PYTEST_MOCK_VAR"] == "1"
+            os.environ["PYTEST_MOCK_VAR"] = "2"
+
+        def test_b():
+            assert os.environ["PYTEST_MOCK_VAR"] == "2"
+        """
+    )
+    testdir.makepyfile(
+        test_z="""
+        import os
+
+        def test_restored():
+            assert "PYTEST_MOCK_VAR" not in os.environ
+        """
+    )
+    result = testdir.runpytest_subprocess("-p", "no:randomly")
+    result.stdout.fnmatch_lines(["* 3 passed*"])
+
+
+class Layered:
+    def method(self) -> str:
+        return "original"
+
+    async def coroutine(self) -> str:
+        return "original"
+
+
+def test_mock_patch_over_other_mocker(mocker: MockerFixture, pytestconfig: Any) -> None:
+    """Patching a target patched by another mocker only swaps the object."""
+    upper = MockerFixture(pytestconfig)
+    upper.patch._scope = "module"
+    base = upper.patch.object(Layered, "method", return_value="upper")
+    upper.patch.object(Layered, "coroutine")
+    try:
+        first = mocker.patch.object(Layered, "method", return_value="first")
+        second = mocker.patch.object(Layered, "method", return_value="second")
+        coroutine = mocker.patch.object(Layered, "coroutine")
+        assert first is not base
+        assert Layered().method() == "second"
+        assert isinstance(coroutine, mocker.AsyncMock)
+
+        mocker.stop(second)
+        assert Layered().method() == "first"
+        mocker.stopall()
+        assert Layered.method is base
+        assert Layered().method() == "upper"
+
+        # Options which need the original object still go through the patcher.
+        mocker.patch.object(Layered, "method", new_callable=lambda: "callable")
+        assert Layered.method == "callable"
+        # Stopping the patch below first also undoes the overlay.
+        upper.stopall()
+        assert Layered().method() == "original"
+        mocker.stopall()
+    finally:
+        upper.stopall()
+    assert Layered().method() == "original"
+
+
+def test_mock_patch_many_over_other_mocker(
+    mocker: MockerFixture, pytestconfig: Any
+) -> None:
+    """``patch.many`` layers its patches like ``patch.object``."""
+    upper = MockerFixture(pytestconfig)
+    upper.patch._scope = "module"
+    upper.patch.object(Layered, "method", return_value="upper")
+    try:
+        mocked = mocker.patch.many({f"{__name__}.Layered.method": mocker.DEFAULT})
+        mocked[f"{__name__}.Layered.method"].return_value = "many"
+        assert Layered().method() == "many"
+        upper.stopall()
+        assert Layered().method() == "original"
+        mocker.stopall()
+    finally:
+        upper.stopall()
+    assert Layered().method() == "original"
+
+
+def test_mock_patch_over_module_mocker(testdir: Any) -> None:
+    testdir.makepyfile(
+        """
+        import os
+
+        import pytest
+
+        @pytest.fixture(scope="module", autouse=True)
+        def getcwd(module_mocker):
+            return module_mocker.patch("os.getcwd", return_value="/module")
+
+        def test_overlay(mocker, getcwd):
+            assert mocker.patch("os.getcwd", return_value="/function") is not getcwd
+            assert os.getcwd() == "/function"
+
+        def test_restored(getcwd):
+            assert os.getcwd() == "/module"
+            assert os.getcwd is getcwd
+        """
+    )
+    testdir.makepyfile(
+        test_z="""
+        import os
+
+        def test_unpatched():
+            assert os.getcwd() != "/module"
+        """
+    )
+    result = testdir.runpytest_subprocess("-p", "no:randomly")
+    result.stdout.fnmatch_lines(["* 3 passed*"])
+
+
 @pytest.mark.parametrize(
     "name",
     [
@@ -224,6 +503,114 @@ def test_mocker_resetall(mocker: MockerFixture) -> None:
     assert mocked_object.run.return_value != "mocked"
 
 
+def test_mocker_snapshot_restore(mocker: MockerFixture) -> None:
+    listdir = mocker.patch("os.listdir", return_value="foo")
+    open = mocker.patch("os.open", side_effect=["bar", "baz"])
+    mocked_object = mocker.create_autospec(TestObject)
+    mocked_object.run.return_value = "mocked"
+    remove = mocker.patch("os.remove", autospec=True)
+    spy = mocker.spy(os.path, "join")
+    listdir("/tmp")
+    mocked_object.run()
+
+    snapshot = mocker.snapshot()
+    for _ in range(2):
+        assert listdir("/foo") == "foo"
+        assert open("/tmp/foo.txt") == "bar"
+        assert mocked_object.run() == "mocked"
+        mocked_object.run.return_value = "changed"
+        listdir.other.return_value.method(1)
+        listdir.return_value = "changed"
+        listdir.new_child()
+        remove("/tmp/foo.txt")
+        os.path.join("a", "b")
+        listdir.__len__.return_value = 10
+
+        mocker.restore(snapshot)
+
+        assert listdir.call_args_list == [mocker.call("/tmp")]
+        assert listdir.mock_calls == [mocker.call("/tmp")]
+        assert listdir.call_count == 1
+        assert listdir.return_value == "foo"
+        assert len(listdir) == 0
+        assert "new_child" not in listdir._mock_children
+        assert not open.called
+        assert mocked_object.mock_calls == [mocker.call.run()]
+        assert mocked_object.run.return_value == "mocked"
+        assert "other" not in listdir._mock_children
+        assert not remove.called
+        assert spy.call_count == 0
+        assert spy.spy_return_list == []
+        assert spy.spy_return is None
+
+
+def test_mocker_snapshot_restore_after_reset(mocker: MockerFixture) -> None:
+    listdir = mocker.patch("os.listdir", return_value="foo")
+    snapshot = mocker.snapshot()
+    listdir.child.return_value = 1
+    listdir.reset_mock()
+    listdir.child()
+    mocker.restore(snapshot)
+    assert not listdir.called
+    assert "child" not in listdir._mock_children
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_mocker_snapshot_restore_calls_after_reset(
+    mocker: MockerFixture, fast: bool
+) -> None:
+    """The calls made before the snapshot survive ``reset_mock()``."""
+    listdir = mocker.patch("os.listdir")
+    spy = mocker.spy(os.path, "join", fast=fast)
+    listdir(1)
+    os.path.join("a", "b")
+    snapshot = mocker.snapshot()
+    listdir.reset_mock()
+    mocker.resetall()
+    listdir(2)
+    os.path.join("c", "d")
+    mocker.restore(snapshot)
+    assert listdir.call_args_list == [mocker.call(1)]
+    assert listdir.mock_calls == [mocker.call(1)]
+    assert listdir.call_count == 1
+    assert spy.call_args_list == [mocker.call("a", "b")]
+    assert spy.spy_return_list == ["a" + os.sep + "b"]
+
+
+def test_mocker_snapshot_restore_configured(mocker: MockerFixture) -> None:
+    """Mocks configured without being called are rolled back too."""
+    m = mocker.patch("os.listdir")
+    child = m.child
+    # Accessing children creates them, without calling them.
+    m.a.b.assert_not_called()
+    m.foo.assert_not_called()
+    snapshot = mocker.snapshot()
+    child.return_value = 2
+    m.foo.side_effect = ValueError
+    m.a.b.c.assert_not_called()
+    m.a.d.assert_not_called()
+    m.e.assert_not_called()
+    mocker.restore(snapshot)
+    assert isinstance(child(), mocker.MagicMock)
+    assert m.foo() is m.foo.return_value
+    assert set(m.a.b._mock_children) == set()
+    assert set(m.a._mock_children) == {"b"}
+    assert "e" not in m._mock_children
+
+
+def test_mocker_snapshot_restore_fast_spy(mocker: MockerFixture) -> None:
+    spy = mocker.spy(os.path, "join", fast=True)
+    os.path.join("a", "b")
+    snapshot = mocker.snapshot()
+    os.path.join("c", "d")
+    spy.assert_called_with("c", "d")
+    mocker.restore(snapshot)
+    assert spy.call_args_list == [mocker.call("a", "b")]
+    assert spy.spy_return_list == ["a" + os.sep + "b"]
+    os.path.join("e", "f")
+    spy.assert_called_with("e", "f")
+
+
 class TestMockerStub:
     def test_call(self, mocker: MockerFixture) -> None:
         stub = mocker.stub()
@@ -571,6 +958,74 @@ def test_callable_like_spy(
     assert spy.spy_return_list == [20]
 
 
+@pytest.mark.parametrize(
+    "kwargs, expected, expected_after_reset",
+    [
+        ({}, [0, 1, 2, 3], [4, 5, 6]),
+        ({"record": "last"}, [3], [6]),
+        ({"record": "none"}, [], []),
+        ({"max_records": 2}, [2, 3], [5, 6]),
+    ],
+)
+def test_spy_record(
+    mocker: MockerFixture,
+    kwargs: dict[str, Any],
+    expected: list[int],
+    expected_after_reset: list[int],
+) -> None:
+    class Foo:
+        def bar(self, x: int) -> int:
+            return x
+
+    foo = Foo()
+    spy = mocker.spy(foo, "bar", **kwargs)
+    for i in range(4):
+        foo.bar(i)
+    assert spy.spy_return == 3
+    assert spy.spy_return_list == expected
+    assert spy.call_count == 4
+
+    mocker.resetall()
+    assert spy.spy_return_list == []
+    foo.bar(4)
+    foo.bar(5)
+    foo.bar(6)
+    assert spy.spy_return_list == expected_after_reset
+    assert spy.spy_return_list != expected_after_reset + [7]
+
+
+def test_spy_weak_records(mocker: MockerFixture) -> None:
+    class Result:
+        pass
+
+    class Foo:
+        def bar(self, x: int) -> Any:
+            return Result() if x == 0 else x
+
+    foo = Foo()
+    spy = mocker.spy(foo, "bar", weak_records=True)
+    foo.bar(0)
+    foo.bar(10)
+    result_ref, int_ref = spy.spy_return_list
+    assert int_ref() == 10
+    # The last result is still referenced by ``spy_return``.
+    assert isinstance(spy.spy_return, int)
+    assert result_ref() is None
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{"record": "some"}, {"max_records": 0}, {"record": "last", "max_records": 2}],
+)
+def test_spy_record_invalid(mocker: MockerFixture, kwargs: dict[str, Any]) -> None:
+    class Foo:
+        def bar(self) -> None:
+            pass
+
+    with pytest.raises(ValueError):
+        mocker.spy(Foo(), "bar", **kwargs)
+
+
 @pytest.mark.parametrize("iterator", [(i for i in range(3)), iter([0, 1, 2])])
 def test_spy_return_iter_duplicates_iterator_when_enabled(
     mocker: MockerFixture, iterator: Iterator[int]
@@ -651,6 +1106,184 @@ def test_spy_return_iter_resets(mocker: MockerFixture) -> None:
     assert spy.spy_return_iter is None
 
 
+@pytest.mark.asyncio
+async def test_spy_return_iter_duplicates_async_iterator(
+    mocker: MockerFixture,
+) -> None:
+    class Foo:
+        async def stream(self, n: int) -> AsyncIterator[int]:
+            for i in range(n):
+                await asyncio.sleep(0)
+                yield i
+
+        async def open_stream(self, n: int) -> AsyncIterator[int]:
+            return self.stream(n)
+
+    foo = Foo()
+    # Async generator functions are spied with the sync wrapper.
+    spy = mocker.spy(foo, "stream", duplicate_iterators=True)
+    assert [i async for i in foo.stream(3)] == [0, 1, 2]
+    spy_iter: Any = spy.spy_return_iter
+    assert isinstance(spy_iter, AsyncIterator)
+    assert [i async for i in spy_iter] == [0, 1, 2]
+
+    spy = mocker.spy(foo, "open_stream", duplicate_iterators=True)
+    result = await foo.open_stream(3)
+    spy_iter = spy.spy_return_iter
+    assert isinstance(spy_iter, AsyncIterator)
+    # Both copies can be consumed concurrently.
+    copies = await asyncio.gather(
+        *(asyncio.create_task(_collect(it)) for it in (result, spy_iter))
+    )
+    assert copies == [[0, 1, 2], [0, 1, 2]]
+
+
+async def _collect(iterator: AsyncIterator[int]) -> list[int]:
+    return [i async for i in iterator]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("duplicate_iterators", [True, "summary"])
+async def test_spy_duplicate_async_iterator_aclose(
+    mocker: MockerFixture, duplicate_iterators: Any
+) -> None:
+    closed = []
+
+    class Foo:
+        async def stream(self) -> AsyncGenerator[int, None]:
+            try:
+                for i in range(10):
+                    yield i
+            finally:
+                closed.append(True)
+
+    foo = Foo()
+    spy = mocker.spy(foo, "stream", duplicate_iterators=duplicate_iterators)
+    async with aclosing(foo.stream()) as stream:
+        async for i in stream:
+            if i == 1:
+                break
+    assert closed == [True]
+    if duplicate_iterators is True:
+        spy_iter: Any = spy.spy_return_iter
+        await spy_iter.aclose()
+        assert [i async for i in spy_iter] == [0, 1]
+
+
+@pytest.mark.asyncio
+async def test_spy_return_iter_async_max_buffered(mocker: MockerFixture) -> None:
+    class Foo:
+        async def stream(self, n: int) -> AsyncIterator[int]:
+            for i in range(n):
+                yield i
+
+    foo = Foo()
+    spy = mocker.spy(foo, "stream", duplicate_iterators=True, max_buffered=3)
+    # The code under test gets every item, the spy only the latest ones.
+    assert [i async for i in foo.stream(10)] == list(range(10))
+    spy_iter: Any = spy.spy_return_iter
+    assert [i async for i in spy_iter] == [7, 8, 9]
+    assert spy_iter.dropped == 7
+
+    # The spy copy being ahead does not drop items for the caller.
+    result = foo.stream(10)
+    spy_iter = spy.spy_return_iter
+    assert [i async for i in spy_iter] == list(range(10))
+    assert [i async for i in result] == list(range(10))
+    assert spy_iter.dropped == 0
+
+
+@pytest.mark.parametrize(
+    "kwargs, expected, dropped",
+    [
+        ({"duplicate_iterators": "ring", "max_buffered": 3}, [7, 8, 9], 7),
+        ({"duplicate_iterators": "sample", "sample_every": 3}, [0, 3, 6, 9], 0),
+        (
+            {"duplicate_iterators": "sample", "sample_every": 3, "max_buffered": 2},
+            [6, 9],
+            2,
+        ),
+    ],
+)
+def test_spy_duplicate_iterators_strategies(
+    mocker: MockerFixture, kwargs: dict[str, Any], expected: list[int], dropped: int
+) -> None:
+    class Foo:
+        def bar(self, n: int) -> Iterator[int]:
+            return iter(range(n))
+
+    foo = Foo()
+    spy = mocker.spy(foo, "bar", **kwargs)
+    assert list(foo.bar(10)) == list(range(10))
+    spy_iter: Any = spy.spy_return_iter
+    assert list(spy_iter) == expected
+    assert spy_iter.dropped == dropped
+
+    # The spy copy being ahead does not drop items for the caller.
+    result = foo.bar(10)
+    spy_iter = spy.spy_return_iter
+    assert list(spy_iter) == [
+        i for i in range(10) if i % kwargs.get("sample_every", 1) == 0
+    ]
+    assert list(result) == list(range(10))
+    assert spy_iter.dropped == 0
+
+
+@pytest.mark.asyncio
+async def test_spy_duplicate_iterators_summary(mocker: MockerFixture) -> None:
+    class Foo:
+        def bar(self, n: int) -> Iterator[int]:
+            return iter(range(n))
+
+        async def baz(self, n: int) -> AsyncIterator[int]:
+            for i in range(n):
+                yield i
+
+    foo = Foo()
+    spy = mocker.spy(foo, "bar", duplicate_iterators="summary")
+    assert list(foo.bar(1000)) == list(range(1000))
+    summary: Any = spy.spy_return_iter
+    assert summary.count == 1000
+    digest = summary.digest
+
+    async_spy = mocker.spy(foo, "baz", duplicate_iterators="summary")
+    assert [i async for i in foo.baz(1000)] == list(range(1000))
+    summary = async_spy.spy_return_iter
+    assert summary.count == 1000
+    assert summary.digest == digest
+
+    foo.bar(1000)
+    summary = spy.spy_return_iter
+    assert (summary.count, summary.digest) == (
+        0,
+        hashlib.blake2b(digest_size=16).hexdigest(),
+    )
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"max_buffered": 2},
+        {"duplicate_iterators": True, "max_buffered": 0},
+        {"duplicate_iterators": "other"},
+        {"duplicate_iterators": "ring"},
+        {"duplicate_iterators": "sample"},
+        {"duplicate_iterators": "sample", "sample_every": 0},
+        {"duplicate_iterators": True, "sample_every": 2},
+        {"duplicate_iterators": "summary", "max_buffered": 2},
+    ],
+)
+def test_spy_duplicate_iterators_invalid(
+    mocker: MockerFixture, kwargs: dict[str, Any]
+) -> None:
+    class Foo:
+        def bar(self) -> None:
+            pass
+
+    with pytest.raises(ValueError):
+        mocker.spy(Foo(), "bar", **kwargs)
+
+
 @pytest.mark.asyncio
 async def test_instance_async_method_spy(mocker: MockerFixture) -> None:
     class Foo:
@@ -666,6 +1299,639 @@ async def test_instance_async_method_spy(mocker: MockerFixture) -> None:
     assert result == 20
 
 
+def test_fast_spy(mocker: MockerFixture) -> None:
+    class Foo:
+        def bar(self, arg):
+            return arg * 2
+
+    foo = Foo()
+    spy = mocker.spy(foo, "bar", fast=True)
+    assert foo.bar(10) == 20
+    assert foo.bar(arg=11) == 22
+
+    assert spy.call_count == 2
+    assert spy.call_args_list == [mocker.call(10), mocker.call(arg=11)]
+    assert spy.spy_return == 22
+    assert spy.spy_return_list == [20, 22]
+    assert spy.spy_exception is None
+    spy.assert_called_with(11)
+    spy.assert_any_call(10)
+    with pytest.raises(AssertionError):
+        spy.assert_called_once()
+
+    # Calls made after the mock view has been built are also visible.
+    foo.bar(12)
+    spy.assert_called_with(12)
+    assert spy.mock_calls[-1] == mocker.call(12)
+
+    mocker.resetall()
+    spy.assert_not_called()
+    assert spy.spy_return_list == []
+
+    mocker.stop(spy)
+    assert foo.bar(1) == 2
+    assert spy.call_count == 0
+
+
+def test_fast_spy_class_and_static_methods(mocker: MockerFixture) -> None:
+    class Foo:
+        def bar(self, arg):
+            return arg * 2
+
+        @classmethod
+        def baz(cls, arg):
+            return arg * 3
+
+        @staticmethod
+        def qux(arg):
+            return arg * 4
+
+    method_spy = mocker.spy(Foo, "bar", fast=True)
+    class_method_spy = mocker.spy(Foo, "baz", fast=True)
+    static_method_spy = mocker.spy(Foo, "qux", fast=True)
+
+    foo = Foo()
+    assert foo.bar(1) == 2
+    assert Foo.baz(1) == 3
+    assert foo.baz(2) == 6
+    assert Foo.qux(1) == 4
+
+    method_spy.assert_called_once_with(foo, 1)
+    class_method_spy.assert_has_calls([mocker.call(1), mocker.call(2)])
+    static_method_spy.assert_called_once_with(1)
+
+
+def test_fast_spy_exception(mocker: MockerFixture) -> None:
+    class Foo:
+        def bar(self, arg):
+            raise ValueError(arg)
+
+    foo = Foo()
+    spy = mocker.spy(foo, "bar", fast=True)
+    with pytest.raises(ValueError):
+        foo.bar(1)
+    spy.assert_called_once_with(1)
+    assert str(spy.spy_exception) == "1"
+
+
+@pytest.mark.asyncio
+async def test_fast_spy_async(mocker: MockerFixture) -> None:
+    class Foo:
+        async def bar(self, arg):
+            return arg * 2
+
+    foo = Foo()
+    spy = mocker.spy(foo, "bar", fast=True)
+    assert await foo.bar(10) == 20
+    spy.assert_called_once_with(10)
+    spy.assert_awaited_once_with(10)
+    assert spy.spy_return == 20
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fast", [False, True])
+async def test_spy_async_metrics(mocker: MockerFixture, fast: bool) -> None:
+    class Foo:
+        async def bar(self, delay: float) -> float:
+            await asyncio.sleep(delay)
+            return delay
+
+        def baz(self) -> None:
+            pass
+
+    foo = Foo()
+    spy = mocker.spy(foo, "bar", fast=fast, max_records=10)
+    assert spy.spy_max_concurrency == 0
+
+    await asyncio.gather(
+        *(asyncio.create_task(foo.bar(0.01), name=f"task-{i}") for i in range(5))
+    )
+    await foo.bar(0)
+    assert spy.spy_max_concurrency == 5
+    assert spy.spy_latencies is not None
+    assert len(spy.spy_latencies) == 6
+    assert min(sorted(spy.spy_latencies)[1:]) >= 0.005
+    assert spy.spy_task_calls is not None
+    assert spy.spy_task_calls == {
+        **{f"task-{i}": 1 for i in range(5)},
+        asyncio.current_task().get_name(): 1,  # type:ignore[union-attr]
+    }
+
+    mocker.resetall()
+    assert spy.spy_max_concurrency == 0
+    assert list(spy.spy_latencies) == []
+    assert spy.spy_task_calls == {}
+
+    sync_spy = mocker.spy(foo, "baz")
+    assert sync_spy.spy_max_concurrency is None
+    assert sync_spy.spy_latencies is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fast", [False, True])
+async def test_spy_async_latencies_follow_record(
+    mocker: MockerFixture, tmp_path: Any, fast: bool
+) -> None:
+    class Foo:
+        async def bar(self) -> None:
+            pass
+
+        async def baz(self) -> None:
+            pass
+
+    foo = Foo()
+    last = mocker.spy(foo, "bar", fast=fast, record="last")
+    none = mocker.spy(foo, "baz", fast=fast, record="none")
+    for _ in range(3):
+        await foo.bar()
+        await foo.baz()
+    assert last.spy_latencies is not None
+    assert len(last.spy_latencies) == 1
+    assert none.spy_latencies is None
+    assert none.spy_max_concurrency == 1
+
+    if not fast:
+        logged = mocker.spy(Foo, "bar", sink=tmp_path / "calls.jsonl")
+        await foo.bar()
+        assert logged.spy_latencies is None
+        mocker.stop(logged)
+
+
+def test_resetall_does_not_add_spy_attributes(mocker: MockerFixture) -> None:
+    mocked = mocker.patch("os.remove")
+    mocker.resetall()
+    assert "spy_latencies" not in vars(mocked)
+    assert "spy_max_concurrency" not in vars(mocked)
+    assert "spy_latencies" not in mocked._mock_children
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_spy_concurrent(mocker: MockerFixture, fast: bool) -> None:
+    class Foo:
+        def bar(self, x: int) -> int:
+            if x < 0:
+                raise ValueError(x)
+            return x
+
+    foo = Foo()
+    spy = mocker.spy(foo, "bar", concurrent=True, fast=fast)
+    spy_local = spy.spy_local
+    assert spy_local is not None
+
+    def work(offset: int) -> tuple[Any, Any]:
+        for i in range(offset, offset + 100):
+            foo.bar(i)
+        return spy_local.spy_return, spy_local.spy_exception
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(work, range(0, 1600, 100)))
+
+    # Each thread sees its own last call.
+    assert results == [(offset + 99, None) for offset in range(0, 1600, 100)]
+    assert sorted(spy.spy_return_list) == list(range(1600))
+    assert spy.spy_return in [offset + 99 for offset in range(0, 1600, 100)]
+    if fast:
+        assert spy.call_count == 1600
+
+    # Values are merged in call order.
+    spy.spy_return_list.clear()
+    for value in [1, 2]:
+        thread = threading.Thread(target=foo.bar, args=(value,))
+        thread.start()
+        thread.join()
+    foo.bar(3)
+    with pytest.raises(ValueError):
+        foo.bar(-1)
+    assert spy.spy_return_list == [1, 2, 3]
+    assert spy.spy_return is None
+    assert str(spy.spy_exception) == "-1"
+    assert str(spy_local.spy_exception) == "-1"
+
+    snapshot = mocker.snapshot()
+    foo.bar(4)
+    mocker.restore(snapshot)
+    assert spy.spy_return_list == [1, 2, 3]
+
+    mocker.resetall()
+    assert spy.spy_return_list == []
+
+
+def test_spy_concurrent_max_records(mocker: MockerFixture) -> None:
+    class Foo:
+        def bar(self, x: int) -> int:
+            return x
+
+    foo = Foo()
+    spy = mocker.spy(foo, "bar", concurrent=True, max_records=3)
+    for i in range(2):
+        thread = threading.Thread(
+            target=lambda i=i: [foo.bar(i * 10 + j) for j in range(5)]
+        )
+        thread.start()
+        thread.join()
+    assert list(spy.spy_return_list) == [12, 13, 14]
+    assert len(spy.spy_return_list) == 3
+
+
+@pytest.mark.parametrize("suffix", [".jsonl", ".pickle"])
+def test_spy_sink(mocker: MockerFixture, tmp_path: Any, suffix: str) -> None:
+    class Foo:
+        def bar(self, x: int, y: Any = None) -> int:
+            if x < 0:
+                raise ValueError(x)
+            return x * 2
+
+    foo = Foo()
+    path = tmp_path / f"calls{suffix}"
+    spy = mocker.spy(foo, "bar", sink=path)
+    # Neither JSON nor pickle can serialize it.
+    unserializable = lambda: None
+    assert foo.bar(1) == 2
+    assert foo.bar(2, y=unserializable) == 4
+    with pytest.raises(ValueError):
+        foo.bar(-1)
+
+    # Only the counters and the last call are kept in memory.
+    assert spy.call_count == 3
+    spy.assert_called_with(-1)
+    assert spy.call_args_list == []
+    assert spy.spy_return_list == []
+    log = spy.spy_call_log
+    assert log is not None
+    assert (log.calls, log.exceptions) == (3, 1)
+
+    mocker.resetall()
+    foo.bar(3)
+    assert spy.call_args_list == []
+
+    calls = list(log)
+    assert [(c.args, c.kwargs, c.return_value) for c in calls] == [
+        ((1,), {}, 2),
+        ((2,), {"y": repr(unserializable)}, 4),
+        ((-1,), {}, None),
+        ((3,), {}, 6),
+    ]
+    assert [c.exception is None for c in calls] == [True, True, False, True]
+    assert calls[0].timestamp <= calls[-1].timestamp
+
+    mocker.stop(spy)
+    assert foo.bar(1) == 2
+    assert log.calls == 4
+    assert len(list(read_call_log(path))) == 4
+
+
+def test_spy_sink_bad_target(mocker: MockerFixture, tmp_path: Any) -> None:
+    path = tmp_path / "calls.jsonl"
+    with pytest.raises(AttributeError):
+        mocker.spy(os.path, "missing", sink=path)
+    assert not path.exists()
+
+    # The spy is undone when the log cannot be opened.
+    original = os.path.join
+    with pytest.raises(FileNotFoundError):
+        mocker.spy(os.path, "join", sink=tmp_path / "missing" / "calls.jsonl")
+    assert os.path.join is original
+
+
+@pytest.mark.asyncio
+async def test_spy_sink_async(mocker: MockerFixture, tmp_path: Any) -> None:
+    class Foo:
+        async def bar(self, x: int) -> int:
+            return x
+
+    foo = Foo()
+    spy = mocker.spy(foo, "bar", sink=tmp_path / "calls.jsonl")
+    assert await foo.bar(10) == 10
+    assert spy.spy_return == 10
+    assert spy.spy_call_log is not None
+    assert [(c.args, c.return_value) for c in spy.spy_call_log] == [((10,), 10)]
+
+
+def test_spy_sink_fast(mocker: MockerFixture, tmp_path: Any) -> None:
+    class Foo:
+        def bar(self) -> None:
+            pass
+
+    with pytest.raises(ValueError):
+        mocker.spy(Foo(), "bar", fast=True, sink=tmp_path / "calls.jsonl")
+
+
+@pytest.mark.parametrize("format", ["jsonl", "pickle"])
+def test_record_calls(mocker: MockerFixture, tmp_path: Any, format: str) -> None:
+    m = mocker.MagicMock(side_effect=[1, ValueError("boom")])
+    log = mocker.record_calls(m, tmp_path / "calls", format=format)
+    m(1, a=2)
+    with pytest.raises(ValueError):
+        m()
+    assert m.call_count == 2
+    assert m.mock_calls == []
+    calls = list(log)
+    assert [(c.args, c.kwargs, c.return_value) for c in calls] == [
+        ((1,), {"a": 2}, 1),
+        ((), {}, None),
+    ]
+    assert "boom" in repr(calls[1].exception)
+
+    mocker.stop(log)
+    m.side_effect = None
+    m(3)
+    assert m.mock_calls == [mocker.call(3)]
+    assert log.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_record_calls_async(mocker: MockerFixture, tmp_path: Any) -> None:
+    m = mocker.AsyncMock(return_value=5)
+    log = mocker.record_calls(m, tmp_path / "calls.jsonl")
+    assert await m(1) == 5
+    m.assert_awaited_once_with(1)
+    assert [(c.args, c.return_value) for c in log] == [((1,), 5)]
+
+
+class Expensive:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def compute(self, a: int, b: int = 10) -> int:
+        self.calls += 1
+        if a < 0:
+            raise ValueError(a)
+        return a + b + self.calls
+
+    async def fetch(self, key: str) -> str:
+        self.calls += 1
+        return key.upper()
+
+    def size(self, items: Any) -> int:
+        self.calls += 1
+        return len(items)
+
+
+def test_record(mocker: MockerFixture, tmp_path: Any) -> None:
+    cassette = tmp_path / "compute.pickle"
+    obj = Expensive()
+    spy = mocker.record(obj, "compute", cassette)
+    assert obj.compute(1) == 12
+    assert obj.compute(1, b=20) == 23
+    assert obj.compute(1, 10) == 14
+    with pytest.raises(ValueError):
+        obj.compute(-1)
+    assert spy.call_count == 4
+    mocker.stop(spy)
+
+    obj = Expensive()
+    m = mocker.record(obj, "compute", cassette)
+    # Arguments are compared after binding them to the signature, and the
+    # results of repeated calls are replayed in order.
+    assert obj.compute(1, b=10) == 12
+    assert obj.compute(a=1) == 14
+    assert obj.compute(1) == 14
+    assert obj.compute(1, 20) == 23
+    with pytest.raises(ValueError):
+        obj.compute(-1)
+    assert obj.calls == 0
+    assert m.call_count == 5
+
+    # Calls which are not in the cassette are made and added to it.
+    assert obj.compute(2) == 13
+    assert obj.compute(2) == 13
+    assert obj.calls == 1
+    mocker.stop(m)
+    assert [c.args for c in read_call_log(cassette)][-1] == (2,)
+
+
+def test_record_strict(mocker: MockerFixture, tmp_path: Any) -> None:
+    cassette = tmp_path / "compute.pickle"
+    obj = Expensive()
+    mocker.stop(mocker.record(obj, "compute", cassette, mode="record"))
+
+    mocker.record(obj, "compute", cassette, strict=True)
+    with pytest.raises(pytest.fail.Exception, match=r"call\(1\) not found"):
+        obj.compute(1)
+    assert obj.calls == 0
+
+
+def test_record_class(mocker: MockerFixture, tmp_path: Any) -> None:
+    """Methods recorded on a class are replayed for any instance."""
+    cassette = tmp_path / "compute.pickle"
+    mocker.record(Expensive, "compute", cassette)
+    assert Expensive().compute(1) == 12
+    mocker.stopall()
+    assert [c.args for c in read_call_log(cassette)] == [(1,)]
+
+    obj = Expensive()
+    m = mocker.record(Expensive, "compute", cassette, strict=True)
+    assert obj.compute(1) == 12
+    assert obj.compute(a=1, b=10) == 12
+    assert obj.calls == 0
+    assert m.call_count == 2
+
+
+def test_record_modes(mocker: MockerFixture, tmp_path: Any) -> None:
+    cassette = tmp_path / "compute.pickle"
+    obj = Expensive()
+    with pytest.raises(FileNotFoundError):
+        mocker.record(obj, "compute", cassette, mode="replay")
+    with pytest.raises(ValueError, match="mode must be one of"):
+        mocker.record(obj, "compute", cassette, mode="new")
+    # The cassette is only opened once the method is patched.
+    with pytest.raises(AttributeError):
+        mocker.record(obj, "missing", cassette, mode="record")
+    assert not cassette.exists()
+
+    mocker.stop(mocker.record(obj, "compute", cassette))
+    cassette.write_bytes(b"")
+    # Recording again overwrites the cassette.
+    mocker.record(obj, "compute", cassette, mode="record")
+    assert obj.compute(1) == 12
+    mocker.stopall()
+    assert [c.return_value for c in read_call_log(cassette)] == [12]
+
+
+def test_record_unpicklable(mocker: MockerFixture, tmp_path: Any) -> None:
+    cassette = tmp_path / "compute.pickle"
+    obj = Expensive()
+    mocker.record(obj, "compute", cassette)
+    with (
+        pytest.warns(PytestMockWarning, match="call not recorded"),
+        pytest.raises(TypeError),
+    ):
+        obj.compute(lambda: None)  # type:ignore[arg-type]
+    mocker.stopall()
+    assert list(read_call_log(cassette)) == []
+
+
+def test_record_container_types(mocker: MockerFixture, tmp_path: Any) -> None:
+    cassette = tmp_path / "size.pickle"
+    obj = Expensive()
+    mocker.record(obj, "size", cassette)
+    assert obj.size([1, 2]) == 2
+    assert obj.size({1: 2}) == 1
+    mocker.stopall()
+
+    obj = Expensive()
+    mocker.record(obj, "size", cassette)
+    assert obj.size([1, 2]) == 2
+    assert obj.size({1: 2}) == 1
+    assert obj.calls == 0
+    # A tuple does not match the recorded list, nor pairs the recorded dict.
+    assert obj.size((1, 2)) == 2
+    assert obj.size(frozenset({(1, 2)})) == 1
+    assert obj.calls == 2
+
+
+async def test_record_async(mocker: MockerFixture, tmp_path: Any) -> None:
+    cassette = tmp_path / "fetch.pickle"
+    obj = Expensive()
+    mocker.record(obj, "fetch", cassette)
+    assert await obj.fetch("a") == "A"
+    mocker.stopall()
+
+    obj = Expensive()
+    m = mocker.record(obj, "fetch", cassette, strict=True)
+    assert await obj.fetch("a") == "A"
+    assert obj.calls == 0
+    m.assert_awaited_once_with("a")
+
+
+def expensive(a: int, b: int = 1) -> list[int]:
+    if a < 0:
+        raise ValueError(a)
+    return [a, b]
+
+
+class Parser:
+    def parse(self, text: str) -> list[str]:
+        return text.split()
+
+
+def test_memoize(mocker: MockerFixture) -> None:
+    target = f"{__name__}.expensive"
+    original = expensive
+    memoized = mocker.memoize(target)
+    assert expensive is memoized
+
+    assert expensive(1) == [1, 1]
+    assert expensive(1, b=1) is expensive(1)
+    assert expensive(2, 1) == [2, 1]
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            expensive(-1)
+    # Unhashable arguments are not cached.
+    assert expensive(0, set()) == [0, set()]  # type:ignore[arg-type]
+    assert memoized.cache_info() == (2, 5, 0, 128, 2)
+
+    memoized.cache_clear()
+    assert memoized.cache_info().currsize == 0
+    mocker.stopall()
+    assert expensive is original
+
+
+def test_memoize_container_types(mocker: MockerFixture) -> None:
+    memoized = mocker.memoize("builtins.repr")
+    assert repr([1]) == "[1]"
+    assert repr((1,)) == "(1,)"
+    assert repr({1: 2}) == "{1: 2}"
+    assert repr(frozenset({(1, 2)})) == "frozenset({(1, 2)})"
+    assert repr(((1,),)) == "((1,),)"
+    assert repr(((1,),)) == "((1,),)"
+    assert memoized.cache_info().hits == 1
+
+    # Keys of the positional fast path match those of bound arguments.
+    mocker.memoize(f"{__name__}.expensive")
+    assert expensive(1, b=(2,)) is expensive(1, (2,))  # type:ignore[arg-type]
+
+
+def test_memoize_method(mocker: MockerFixture) -> None:
+    memoized = mocker.memoize(f"{__name__}.Parser.parse")
+    a, b = Parser(), Parser()
+    assert a.parse("x y") is a.parse("x y")
+    assert b.parse("x y") == ["x", "y"]
+    assert memoized.cache_info()[:2] == (1, 2)
+
+
+@pytest.mark.parametrize(
+    "policy, kept",
+    [("lru", [2, 3]), ("lfu", [1, 3]), ("ttl", [2, 3])],
+)
+def test_memoize_policies(mocker: MockerFixture, policy: str, kept: list[int]) -> None:
+    memoized = mocker.memoize(
+        f"{__name__}.expensive",
+        maxsize=2,
+        policy=policy,
+        ttl=60 if policy == "ttl" else None,
+    )
+    # Adding 3 evicts 1 (the least recently used and the oldest) or 2 (the
+    # least frequently used).
+    for a in (1, 1, 2, 3):
+        expensive(a)
+    assert memoized.cache_info() == (1, 3, 1, 2, 2)
+    for a in kept:
+        expensive(a)
+    assert memoized.cache_info() == (3, 3, 1, 2, 2)
+
+
+_reentered: set[int] = set()
+
+
+def reentrant(a: int) -> int:
+    # Miss the same key again before the first miss is cached, like two
+    # threads calling the memoized function at once.
+    if a not in _reentered:
+        _reentered.add(a)
+        reentrant(a)
+    return a
+
+
+@pytest.mark.parametrize("policy", ["lru", "lfu", "ttl"])
+def test_memoize_same_key_missed_twice(mocker: MockerFixture, policy: str) -> None:
+    _reentered.clear()
+    memoized = mocker.memoize(
+        f"{__name__}.reentrant",
+        maxsize=2,
+        policy=policy,
+        ttl=60 if policy == "ttl" else None,
+    )
+    reentrant(1)
+    reentrant(2)
+    assert memoized.cache_info() == (0, 4, 0, 2, 2)
+    reentrant(1)
+    for a in (3, 4, 5):
+        reentrant(a)
+    assert memoized.cache_info().evictions == 3
+    assert memoized.cache_info().currsize == 2
+
+
+def test_memoize_ttl(mocker: MockerFixture) -> None:
+    now = [0.0]
+    mocker.patch("time.monotonic", side_effect=lambda: now[0])
+    memoized = mocker.memoize(f"{__name__}.expensive", policy="ttl", ttl=10)
+    expensive(1)
+    now[0] = 5
+    expensive(1)
+    expensive(2)
+    now[0] = 11
+    expensive(1)
+    expensive(2)
+    assert memoized.cache_info() == (2, 3, 1, 128, 2)
+
+
+def test_memoize_errors(mocker: MockerFixture) -> None:
+    target = f"{__name__}.expensive"
+    with pytest.raises(ValueError, match="policy must be one of"):
+        mocker.memoize(target, policy="fifo")
+    with pytest.raises(ValueError, match="maxsize must be positive"):
+        mocker.memoize(target, maxsize=0)
+    with pytest.raises(ValueError, match="requires ttl"):
+        mocker.memoize(target, policy="ttl")
+    with pytest.raises(ValueError, match="ttl must be positive"):
+        mocker.memoize(target, policy="ttl", ttl=0)
+    with pytest.raises(ValueError, match="ttl can only be used"):
+        mocker.memoize(target, ttl=1)
+    with pytest.raises(TypeError, match="Need a valid target"):
+        mocker.memoize("expensive")
+
+
 @contextmanager
 def assert_traceback() -> Generator[None, None, None]:
     """
@@ -972,6 +2238,89 @@ def test_monkeypatch_no_terminal(testdir: Any) -> None:
     assert result.stdout.lines == []
 
 
+def test_monkeypatch_lazy(testdir: Any) -> None:
+    """
+    The mock module is only imported and monkeypatched once a test needs it,
+    either by using a mocker fixture or by importing the mock module (even in
+    the body of the test).
+    """
+    testdir.makepyfile(
+        test_a="""
+        import sys
+
+        def test_unused():
+            assert "unittest.mock" not in sys.modules
+
+        def test_import_in_body():
+            from unittest.mock import NonCallableMock
+            assert hasattr(NonCallableMock.assert_called, "__wrapped__")
+
+        def test_mocker(mocker):
+            assert hasattr(mocker.NonCallableMock.assert_called, "__wrapped__")
+        """,
+        test_b="""
+        from unittest.mock import MagicMock
+
+        def test_imported():
+            m = MagicMock()
+            m(1, greet='hello')
+            m.assert_called_once_with(1, greet='hey')
+        """,
+    )
+    result = testdir.runpytest_subprocess("test_a.py")
+    result.stdout.fnmatch_lines(["* 3 passed*"])
+    result = testdir.runpytest_subprocess("test_b.py")
+    result.stdout.fnmatch_lines(["*pytest introspection follows:*", "* 1 failed*"])
+
+    testdir.makepyfile(
+        test_c="""
+        def test_imported_in_body():
+            from unittest.mock import MagicMock
+            m = MagicMock()
+            m(1, greet='hello')
+            m.assert_called_once_with(1, greet='hey')
+        """
+    )
+    result = testdir.runpytest_subprocess("test_c.py")
+    result.stdout.fnmatch_lines(["*pytest introspection follows:*", "* 1 failed*"])
+
+
+def test_unwrap_assert_methods() -> None:
+    """The mock classes are restored exactly, including inherited methods."""
+    code = """if True:
+        import unittest.mock
+        from pytest_mock import plugin
+
+        class Config:
+            def getini(self, name):
+                return False
+
+            def add_cleanup(self, func):
+                self.cleanup = func
+
+        classes = (unittest.mock.NonCallableMock, unittest.mock.AsyncMock)
+        before = [dict(vars(cls)) for cls in classes]
+        config = Config()
+        plugin.wrap_assert_methods(config)
+        assert unittest.mock.AsyncMock.assert_awaited.__module__ == plugin.__name__
+        config.cleanup()
+        assert [dict(vars(cls)) for cls in classes] == before
+    """
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_import_no_mock_module() -> None:
+    """``pytest_mock`` does not import the mock module by itself."""
+    code = (
+        "import sys, pytest, pytest_mock;"
+        "print(sorted({'asyncio', 'unittest.mock'} & set(sys.modules)))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, check=True, text=True
+    ).stdout
+    assert output.strip() == "[]"
+
+
 def test_standalone_mock(testdir: Any) -> None:
     """Check that the "mock_use_standalone" is being used."""
     pytest.importorskip("mock")
@@ -994,6 +2343,71 @@ def test_standalone_mock(testdir: Any) -> None:
     assert result.ret == 0
 
 
+def test_autospec_cache(testdir: Any) -> None:
+    testdir.makeini(
+        """
+        [pytest]
+        mock_autospec_cache = true
+        asyncio_mode=auto
+        """
+    )
+    testdir.makepyfile(
+        """
+        import pytest
+        from pytest_mock import plugin
+
+        class Foo:
+            def bar(self, a):
+                return a
+
+        def test_signature_is_cached(mocker):
+            for _ in range(2):
+                foo = mocker.create_autospec(Foo, instance=True)
+                foo.bar(1)
+                with pytest.raises(TypeError):
+                    foo.bar(1, 2)
+            assert (Foo, False, True, False) in plugin._autospec_cache
+
+        def test_cache_invalidated_on_change(mocker):
+            mocker.create_autospec(Foo, instance=True).bar(1)
+
+            def bar(self, a, b):
+                return a + b
+
+            mocker.patch.object(Foo, "bar", bar)
+            foo = mocker.create_autospec(Foo, instance=True)
+            foo.bar(1, 2)
+            with pytest.raises(TypeError):
+                foo.bar(1)
+
+        def test_spy_bound_methods(mocker):
+            for _ in range(2):
+                foo = Foo()
+                spy = mocker.spy(foo, "bar")
+                assert foo.bar(3) == 3
+                spy.assert_called_once_with(3)
+                with pytest.raises(TypeError):
+                    foo.bar(1, 2)
+
+        def test_locals_not_cached(mocker):
+            def local(a):
+                return a
+
+            class Local:
+                def bar(self, a):
+                    return a
+
+            mocker.stub()
+            mocker.create_autospec(local)
+            mocker.create_autospec(Local, instance=True).bar(1)
+            for key in plugin._autospec_cache:
+                assert "<" not in getattr(key[0], "__qualname__", "")
+    """
+    )
+    result = testdir.runpytest_subprocess()
+    result.stdout.fnmatch_lines("* 4 passed in *")
+
+
 @pytest.mark.usefixtures("needs_assert_rewrite")
 def test_detailed_introspection(testdir: Any) -> None:
     """Check that the "mock_use_standalone" is being used."""
@@ -1011,9 +2425,9 @@ def test_detailed_introspection(testdir: Any) -> None:
             m.assert_called_once_with('', bar=4)
     """
     )
-    result = testdir.runpytest("-s")
+    result = testdir.runpytest("-s", "-rf")
     expected_lines = [
-        "*AssertionError: expected call not found.",
+        "E   *AssertionError: expected call not found.",
         "*Expected: mock('', bar=4)",
         "*Actual: mock('fo')",
     ]
@@ -1028,8 +2442,10 @@ def test_detailed_introspection(testdir: Any) -> None:
         "*Right contains* more item*",
         "*{'bar': 4}*",
         "*Use -v to*",
+        "FAILED *::test - AssertionError: expected call*",
     ]
     result.stdout.fnmatch_lines(expected_lines)
+    result.stdout.no_fnmatch_line("*_MockAssertionError*")
 
 
 @pytest.mark.usefixtures("needs_assert_rewrite")
@@ -1084,6 +2500,124 @@ def test_missing_introspection(testdir: Any) -> None:
     assert "pytest introspection follows:" not in result.stdout.str()
 
 
+@pytest.mark.usefixtures("needs_assert_rewrite")
+def test_introspection_is_lazy(mocker: MockerFixture) -> None:
+    comparisons = 0
+
+    class Arg:
+        def __eq__(self, other: object) -> bool:
+            nonlocal comparisons
+            comparisons += 1
+            return False
+
+    stub = mocker.stub()
+    stub(Arg())
+    with pytest.raises(AssertionError) as excinfo:
+        stub.assert_has_calls([mocker.call(1)])
+    count = comparisons
+    assert "pytest introspection follows:" in str(excinfo.value)
+    assert comparisons > count
+    # Rendered only once.
+    count = comparisons
+    assert type(excinfo.value) is AssertionError
+    assert str(excinfo.value) == str(excinfo.value.args[0])
+    assert comparisons == count
+
+
+def test_assertion_error_pickle(mocker: MockerFixture) -> None:
+    stub = mocker.stub()
+    stub(1)
+    with pytest.raises(AssertionError) as excinfo:
+        stub.assert_called_with(2)
+    e = pickle.loads(pickle.dumps(excinfo.value))
+    assert type(e) is AssertionError
+    assert type(e.args[0]) is str
+    assert str(e) == str(excinfo.value)
+    assert "expected call not found" in str(e)
+
+
+@pytest.mark.usefixtures("needs_assert_rewrite")
+def test_introspection_limit(testdir: Any) -> None:
+    testdir.makeini(
+        """
+        [pytest]
+        mock_introspection_limit = 2
+        asyncio_mode=auto
+        """
+    )
+    testdir.makepyfile(
+        """
+        def test(mocker):
+            m = mocker.Mock()
+            for i in range(10):
+                m(i)
+            m.assert_has_calls([mocker.call(i + 100) for i in range(10)])
+    """
+    )
+    result = testdir.runpytest()
+    result.stdout.fnmatch_lines(
+        [
+            "*pytest introspection follows:*",
+            "*assert (0,) == (100,)*",
+            "*assert (1,) == (101,)*",
+            "*... 6 more differing calls omitted *",
+            "*assert (8,) == (108,)*",
+            "*assert (9,) == (109,)*",
+        ]
+    )
+    result.stdout.no_fnmatch_line("*assert (2,) == (102,)*")
+
+
+def test_call_index(testdir: Any) -> None:
+    testdir.makeini(
+        """
+        [pytest]
+        mock_call_index = true
+        asyncio_mode=auto
+        """
+    )
+    testdir.makepyfile(
+        """
+        import pytest
+        from unittest.mock import ANY, call
+
+        def func(a, b=0):
+            pass
+
+        def test_any_call(mocker):
+            m = mocker.create_autospec(func)
+            for i in range(100):
+                m(i, b={"i": i})
+            m.assert_any_call(50, {"i": 50})
+            m.assert_any_call(a=50, b={"i": 50})
+            m(ANY)
+            m.assert_any_call(1000)
+            with pytest.raises(AssertionError):
+                m.assert_any_call(1000, b=1)
+            m.reset_mock()
+            with pytest.raises(AssertionError):
+                m.assert_any_call(50, {"i": 50})
+
+        def test_has_calls(mocker):
+            m = mocker.Mock()
+            for i in range(100):
+                m(i)
+                m.method(i)
+            m.assert_has_calls([call(5), call.method(5), call(6)])
+            with pytest.raises(AssertionError, match="Calls not found"):
+                m.assert_has_calls([call(5), call(6)])
+            m.assert_has_calls([call.method(7), call(2)], any_order=True)
+            with pytest.raises(AssertionError, match="does not contain all"):
+                m.assert_has_calls([call(5), call(5)], any_order=True)
+            m(5)
+            m.assert_has_calls([call(5), call(5)], any_order=True)
+            m.assert_has_calls([call(ANY), call.method(ANY)])
+    """
+    )
+    result = testdir.runpytest_subprocess()
+    result.assert_outcomes(passed=2)
+
+
 def test_assert_called_with_unicode_arguments(mocker: MockerFixture) -> None:
     """Test bug in assert_call_with called with non-ascii unicode string (#91)"""
     stub = mocker.stub()
@@ -1093,6 +2627,243 @@ def test_assert_called_with_unicode_arguments(mocker: MockerFixture) -> None:
         stub.assert_called_with("lak")
 
 
+def test_mock_profile(testdir: Any) -> None:
+    testdir.makeini(
+        """
+        [pytest]
+        asyncio_mode=auto
+        """
+    )
+    testdir.makepyfile(
+        """
+        import os
+
+        def test_patch(mocker):
+            mocker.patch("os.remove")
+            mocker.spy(os.path, "join")
+            mocker.patch.many({"os.rmdir": mocker.DEFAULT})
+
+        def test_autospec(mocker):
+            mocker.create_autospec(os.stat_result)
+    """
+    )
+    result = testdir.runpytest_subprocess(
+        "--mock-profile", "--mock-profile-json=profile.json"
+    )
+    result.stdout.fnmatch_lines(
+        [
+            "*= pytest-mock profile =*",
+            "6 operations took *s",
+            "slowest 10 targets:",
+            "slowest 10 tests:",
+            "profile written to profile.json",
+            "* 2 passed in *",
+        ]
+    )
+    # Entries are sorted by time, so check them separately.
+    result.stdout.fnmatch_lines("*ms      1x patch           os.remove")
+    result.stdout.fnmatch_lines("*ms      4x test_mock_profile.py::test_patch")
+    result.stdout.fnmatch_lines("*ms      2x test_mock_profile.py::test_autospec")
+    with open(testdir.tmpdir / "profile.json", encoding="utf-8") as f:
+        profile = json.load(f)
+    assert profile["tests"]["test_mock_profile.py::test_patch"]["count"] == 4
+    assert {(t["kind"], t["target"]) for t in profile["targets"]} == {
+        ("patch", "os.remove"),
+        ("patch", "os.rmdir"),
+        ("spy", "posixpath.join" if os.name != "nt" else "ntpath.join"),
+        ("create_autospec", "os.stat_result"),
+        ("stopall", "<teardown>"),
+    }
+
+
+def test_mock_profile_xdist(testdir: Any, monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Simulate pytest-xdist: workers send their measurements in ``workeroutput``,
+    and the controller receives them in ``pytest_testnodedown``.
+    """
+    testdir.makeconftest(
+        """
+        import json
+        import os
+        import types
+
+        import pytest
+
+        @pytest.hookimpl(tryfirst=True)
+        def pytest_configure(config):
+            if os.environ["ROLE"] == "worker":
+                config.workeroutput = {}
+
+        def pytest_sessionstart(session):
+            if os.environ["ROLE"] == "controller":
+                profiler = session.config.pluginmanager.get_plugin(
+                    "pytest_mock_profiler"
+                )
+                for path in ("worker0.json", "worker1.json"):
+                    with open(path) as f:
+                        node = types.SimpleNamespace(workeroutput=json.load(f))
+                    profiler.pytest_testnodedown(node, None)
+
+        def pytest_unconfigure(config):
+            if os.environ["ROLE"] == "worker":
+                with open(os.environ["OUTPUT"], "w") as f:
+                    json.dump(config.workeroutput, f)
+        """
+    )
+    testdir.makepyfile(
+        test_worker="""
+        def test_patch(mocker):
+            mocker.patch("os.remove")
+        """
+    )
+    monkeypatch.setenv("ROLE", "worker")
+    for i in range(2):
+        monkeypatch.setenv("OUTPUT", f"worker{i}.json")
+        result = testdir.runpytest_subprocess("--mock-profile", "test_worker.py")
+        result.stdout.fnmatch_lines("* 1 passed in *")
+
+    monkeypatch.setenv("ROLE", "controller")
+    testdir.makepyfile(test_controller="")
+    result = testdir.runpytest_subprocess(
+        "--mock-profile-json=profile.json", "test_controller.py"
+    )
+    result.stdout.fnmatch_lines(
+        [
+            "*= pytest-mock profile =*",
+            "4 operations took *s in 2 workers",
+        ]
+    )
+    result.stdout.fnmatch_lines("*ms      2x patch           os.remove")
+    with open(testdir.tmpdir / "profile.json", encoding="utf-8") as f:
+        profile = json.load(f)
+    assert profile["tests"]["test_worker.py::test_patch"]["count"] == 4
+
+
+def test_mock_profile_disabled(testdir: Any) -> None:
+    testdir.makepyfile(
+        """
+        def test_patch(mocker):
+            mocker.patch("os.remove")
+    """
+    )
+    result = testdir.runpytest_subprocess()
+    result.stdout.fnmatch_lines("* 1 passed in *")
+    result.stdout.no_fnmatch_line("*pytest-mock profile*")
+
+
+def test_mock_redundant_patches(testdir: Any) -> None:
+    testdir.makepyfile(
+        """
+        import os
+
+        import pytest
+
+        @pytest.fixture(scope="session", autouse=True)
+        def remove(session_mocker):
+            return session_mocker.patch("os.remove")
+
+        @pytest.fixture(scope="class")
+        def getcwd(class_mocker):
+            return class_mocker.patch("os.getcwd")
+
+        def test_a(mocker, remove):
+            mocker.patch("os.remove", remove)
+
+        def test_b(mocker):
+            mocker.patch("os.remove")
+
+        class TestClass:
+            def test_c(self, mocker, getcwd):
+                mocker.patch("os.getcwd")
+                mocker.patch("os.getcwd")
+    """
+    )
+    result = testdir.runpytest_subprocess("--mock-redundant-patches")
+    result.stdout.fnmatch_lines(
+        [
+            "*= pytest-mock redundant patches =*",
+            (
+                "     2x os.remove: patched by session_mocker, again by mocker "
+                "(1x with the same object)"
+            ),
+            "     1x os.getcwd: patched by class_mocker, again by mocker",
+            "* 3 passed in *",
+        ]
+    )
+
+
+def test_mock_redundant_patches_none(testdir: Any) -> None:
+    testdir.makepyfile(
+        """
+        def test_patch(mocker):
+            mocker.patch("os.remove")
+            mocker.patch("os.remove")
+    """
+    )
+    result = testdir.runpytest_subprocess("--mock-redundant-patches")
+    result.stdout.fnmatch_lines(
+        [
+            "*= pytest-mock redundant patches =*",
+            "no target was patched again by a narrower mocker",
+        ]
+    )
+
+
+def test_mock_pool(testdir: Any) -> None:
+    testdir.makeini(
+        """
+        [pytest]
+        mock_pool_size = 2
+        asyncio_mode=auto
+        """
+    )
+    testdir.makepyfile(
+        """
+        import pytest
+        from unittest.mock import AsyncMock, MagicMock
+
+        ids = []
+
+        @pytest.mark.parametrize("i", range(3))
+        def test_reused(mocker, i):
+            m = mocker.MagicMock(return_value=3, **{"a.return_value": 1})
+            ids.append(id(m))
+            assert isinstance(m, mocker.MagicMock)
+            assert isinstance(m, MagicMock)
+            # fresh state on each test
+            assert not m.called
+            assert m() == 3
+            assert m.a() == 1
+            assert not hasattr(m, "z") or isinstance(m.z, MagicMock)
+            assert len(m) == 0
+            assert m.b.call_count == 0
+            assert m.mock_calls == [mocker.call(), mocker.call.a(), mocker.call.__len__()]
+            # dirty it
+            m.z = 1
+            m.return_value = 4
+            m.a.return_value = 5
+            m.b()
+            m.__len__.return_value = 10
+
+        def test_same_mock_reused():
+            assert len(set(ids)) == 1
+
+        def test_not_pooled(mocker):
+            assert mocker.MagicMock(side_effect=[1]) is not mocker.MagicMock(side_effect=[1])
+            assert mocker.MagicMock(int).return_value is not None
+
+        async def test_async(mocker):
+            m = mocker.AsyncMock(return_value=1)
+            assert isinstance(m, AsyncMock)
+            assert not m.await_count
+            assert await m() == 1
+            m.return_value = 2
+    """
+    )
+    result = testdir.runpytest_subprocess("-p", "no:randomly")
+    result.assert_outcomes(passed=6)
+
+
 def test_plain_stopall(testdir: Any) -> None:
     """patch.stopall() in a test should not cause an error during unconfigure (#137)"""
     testdir.makeini(
@@ -1428,3 +3199,39 @@ def test_stop_multiple_patches(mocker: MockerFixture) -> None:
 
     assert Class1.get() == 1
     assert Class2.get() == 2
+
+
+def test_stop_same_object_patched_twice(mocker: MockerFixture) -> None:
+    class Class1:
+        value = 1
+
+    class Class2:
+        value = 2
+
+    new = mocker.MagicMock()
+    assert mocker.patch.object(Class1, "value", new) is new
+    assert mocker.patch.object(Class2, "value", new) is new
+
+    # The oldest registration is stopped first.
+    mocker.stop(new)
+    assert Class1.value == 1
+    assert vars(Class2)["value"] is new
+
+    mocker.stop(new)
+    assert Class2.value == 2
+
+    with pytest.raises(ValueError):
+        mocker.stop(new)
+
+
+def test_stopall_after_stop_undoes_in_reverse_order(mocker: MockerFixture) -> None:
+    class Foo:
+        value = 0
+
+    mocks = [mocker.patch.object(Foo, "value", object()) for _ in range(5)]
+    mocker.stop(mocks[2])
+    mocker.stop(mocks[4])
+    assert Foo.value is mocks[3]
+
+    mocker.stopall()
+    assert Foo.value == 0